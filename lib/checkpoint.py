@@ -0,0 +1,157 @@
+import os
+import json
+import lineindex
+try:
+    import fcntl  # locking the checkpoint file, not available on Windows
+except ImportError:
+    fcntl = None
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+CHECKPOINT_LOCK_EXT = '.lock'  # extension of the lock file next to the checkpoint file
+
+
+def file_fingerprint(file_path):
+    """
+    Get the attributes identifying the current content of a log file.
+    :param file_path: Path of the log file
+    :return: Dictionary containing
+             - inode: inode of the log file
+             - size: size of the log file in bytes
+             - head: checksum of the first bytes of the log file
+             - headLen: number of bytes the checksum is calculated for
+    """
+    with open(file_path, 'rb') as fh:
+        stat = os.fstat(fh.fileno())
+        head_len = min(lineindex.LINE_INDEX_HEAD_LEN, stat.st_size)
+        return {'inode': stat.st_ino, 'size': stat.st_size,
+                'head': lineindex.head_checksum(fh, head_len), 'headLen': head_len}
+
+
+def is_continued(file_path, entry):
+    """
+    Check if a log file is the continuation of the file a checkpoint was recorded for.
+    This is not the case, if the file was rotated (new inode) or truncated
+    (smaller size than the checkpoint offset, different first bytes).
+    :param file_path: Path of the log file
+    :param entry: Checkpoint entry
+    :return: True if parsing can resume at the checkpoint offset
+    """
+    try:
+        with open(file_path, 'rb') as fh:
+            stat = os.fstat(fh.fileno())
+            if stat.st_ino != entry['inode'] or stat.st_size < entry['offset']:
+                return False
+            return lineindex.head_checksum(fh, entry['headLen']) == entry['head']
+    except OSError:
+        return False
+
+
+def is_predecessor(file_path, entry):
+    """
+    Check if a rotated log file is the file a checkpoint was recorded for.
+    The rotated file is identified by its inode (renamed file)
+    or by its first bytes (copied file).
+    :param file_path: Path of the rotated log file
+    :param entry: Checkpoint entry
+    :return: True if the rest of the rotated file can be parsed from the checkpoint offset
+    """
+    try:
+        with open(file_path, 'rb') as fh:
+            stat = os.fstat(fh.fileno())
+            if stat.st_size < entry['offset']:
+                return False
+            if stat.st_ino == entry['inode']:
+                return True
+            return lineindex.head_checksum(fh, entry['headLen']) == entry['head']
+    except OSError:
+        return False
+
+
+class ClsCheckpointStore:
+    """ This class is a container for checkpoints of parser runs.
+
+    A checkpoint is kept for every combination of log id and parser id.
+    It records inode, size and the byte offset up to which the log file has been parsed,
+    so that the next run parses only the lines appended since then.
+    Several processes may use the same checkpoint file, saving writes only the checkpoints
+    set by this store and keeps the ones saved by the other processes in the meantime.
+    """
+
+    def __init__(self, file_path):
+        self.__file_path = file_path
+        self.__entries = {}
+        self.__changed = set()  # keys of the checkpoints set since the last save
+        self.load()
+
+    @property
+    def file_path(self):
+        return self.__file_path
+
+    @staticmethod
+    def key(log_id, parser_id):
+        return log_id + '/' + parser_id
+
+    def load(self):
+        """
+        Load the checkpoints from the checkpoint file.
+        :return: True if the checkpoint file was read
+        """
+        try:
+            with open(self.__file_path, 'r') as fh:
+                self.__entries = json.load(fh)
+            assert isinstance(self.__entries, dict)
+            return True
+        except (OSError, ValueError, AssertionError):
+            self.__entries = {}
+            return False
+
+    def save(self):
+        """
+        Write the checkpoints into the checkpoint file, the directory is created if necessary.
+        While the checkpoint file is locked, it is read again and the checkpoints set by this store
+        are merged into it. The file is replaced atomically.
+        :return: True if the checkpoints were written, False - they are kept for the next save
+        """
+        try:
+            os.makedirs(os.path.dirname(self.__file_path) or '.', exist_ok=True)
+            with open(self.__file_path + CHECKPOINT_LOCK_EXT, 'a') as lock:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)  # released by closing the lock file
+                changed = {key: self.__entries[key] for key in self.__changed}
+                self.load()
+                self.__entries.update(changed)
+                tmp_path = self.__file_path + '.' + str(os.getpid()) + '.tmp'
+                with open(tmp_path, 'w') as fh:
+                    json.dump(self.__entries, fh, sort_keys=True, indent=4)
+                os.replace(tmp_path, self.__file_path)
+        except OSError:
+            return False
+        self.__changed = set()
+        return True
+
+    def get(self, log_id, parser_id):
+        """
+        Get the checkpoint of a parser run.
+        :param log_id: Id of the log
+        :param parser_id: Id of the parser
+        :return: Checkpoint entry or None
+                 - file: path of the log file
+                 - inode, size, head, headLen: fingerprint of the log file
+                 - offset: byte offset behind the last parsed line
+                 - line: number of the last parsed line
+        """
+        return self.__entries.get(self.key(log_id, parser_id))
+
+    def set(self, log_id, parser_id, entry):
+        """
+        Set the checkpoint of a parser run.
+        :param log_id: Id of the log
+        :param parser_id: Id of the parser
+        :param entry: Checkpoint entry
+        """
+        self.__entries[self.key(log_id, parser_id)] = entry
+        self.__changed.add(self.key(log_id, parser_id))
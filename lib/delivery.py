@@ -0,0 +1,170 @@
+import time
+import math
+import asyncio
+import concurrent.futures
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+DELIVERY_CONCURRENCY = 4  # concurrent requests per host
+DELIVERY_TIMEOUT = 30  # seconds to wait for a connection or a response, kept by the sockets of the send functions
+DELIVERY_RETRIES = 3  # retries of a failed request
+DELIVERY_BACKOFF = 0.5  # seconds to wait before the first retry, doubled for every further retry
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}  # HTTP status codes of temporary failures
+REPORT_PERCENTILES = [50, 90, 99]
+
+
+class ClsRetry(Exception):
+    """ Temporary failure of a send function, the request is repeated. """
+    pass
+
+
+class ClsConnectError(OSError):
+    """ The connection to the target cannot be established, nothing has been sent.
+    The request is repeated like after a temporary failure.
+    """
+    pass
+
+
+# failures of a send function, after which the request is repeated
+RETRY_ERRORS = (ClsRetry, ClsConnectError)
+
+
+class ClsDeliveryJob:
+    """ This class is one request of the delivery, e.g. one event sent via http
+    or the events of one chunkKey sent via e-mail.
+
+    The send function is called without arguments and returns a tuple (ok, detail).
+    It keeps the timeout on its sockets. ClsRetry and ClsConnectError are temporary failures,
+    any other exception is a failure, which is not repeated, as the target may have received
+    the request already.
+    """
+
+    __slots__ = ('host', 'label', 'send')
+
+    def __init__(self, host, label, send):
+        self.host = host
+        self.label = label
+        self.send = send
+
+
+class ClsDeliveryReport:
+    """ This class collects the outcome of the requests of a delivery. """
+
+    def __init__(self):
+        self.__latencies = []  # seconds of every attempt
+        self.__delivered = 0
+        self.__failed = []  # tuples (label, detail)
+        self.__retries = 0
+
+    @property
+    def delivered(self):
+        return self.__delivered
+
+    @property
+    def failed(self):
+        return self.__failed
+
+    def add_attempt(self, latency):
+        self.__latencies.append(latency)
+
+    def add(self, job, ok, detail, attempts):
+        self.__retries += attempts - 1
+        if ok:
+            self.__delivered += 1
+        else:
+            self.__failed.append((job.label, detail))
+
+    @staticmethod
+    def percentile(values, p):
+        """
+        Get a percentile by the nearest rank method.
+        :param values: Sorted list of values
+        :param p: Percentile, 0 < p <= 100
+        :return: Value
+        """
+        return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+    @property
+    def summary(self):
+        """
+        :return: Dictionary containing the number of delivered and failed requests, the number of retries
+                 and the latency percentiles in milliseconds
+        """
+        summary = {'delivered': self.__delivered, 'failed': len(self.__failed), 'retries': self.__retries}
+        latencies = sorted(self.__latencies)
+        if latencies:
+            for p in REPORT_PERCENTILES:
+                summary['p' + str(p)] = round(self.percentile(latencies, p) * 1000, 1)
+            summary['max'] = round(latencies[-1] * 1000, 1)
+        return summary
+
+
+class ClsDelivery:
+    """ This class sends delivery jobs concurrently.
+
+    The jobs run in an asyncio event loop, the blocking send functions in threads.
+    The number of concurrent requests is limited per host, a request counts until its
+    send function has returned. A request, which fails temporarily, is repeated after
+    a waiting time doubling from retry to retry.
+    """
+
+    def __init__(self, logger, concurrency=DELIVERY_CONCURRENCY, retries=DELIVERY_RETRIES, backoff=DELIVERY_BACKOFF):
+        self.__logger = logger
+        self.__concurrency = max(1, concurrency)
+        self.__retries = retries
+        self.__backoff = backoff
+
+    def run(self, jobs):
+        """
+        Send the jobs.
+        :param jobs: List of delivery jobs
+        :return: Delivery report
+        """
+        report = ClsDeliveryReport()
+        if jobs:
+            asyncio.run(self.deliver(jobs, report))
+        return report
+
+    async def deliver(self, jobs, report):
+        hosts = {job.host for job in jobs}
+        semaphores = {host: asyncio.Semaphore(self.__concurrency) for host in hosts}
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.__concurrency * len(hosts))
+        try:
+            await asyncio.gather(*[self.deliver_job(job, semaphores[job.host], executor, report) for job in jobs])
+        finally:
+            executor.shutdown()
+
+    async def deliver_job(self, job, semaphore, executor, report):
+        """
+        Send one job, with retries.
+        :param job: Delivery job
+        :param semaphore: Semaphore limiting the concurrent requests to the host of the job
+        :param executor: Executor running the send functions
+        :param report: Delivery report
+        """
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        while True:
+            attempts += 1
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    # the semaphore is held until the send function has returned, it is not abandoned
+                    # by a timeout of its own, which would let a retry run alongside the request
+                    ok, detail = await loop.run_in_executor(executor, job.send)
+                    temporary = False
+                except RETRY_ERRORS as e:
+                    ok, detail, temporary = False, str(e) or e.__class__.__name__, True
+                except Exception as e:
+                    ok, detail, temporary = False, str(e) or e.__class__.__name__, False
+                report.add_attempt(time.perf_counter() - start)
+            if ok or not temporary or attempts > self.__retries:
+                break
+            self.__logger.debug(job.label + ': ' + detail + ', retry ' + str(attempts) + '/' + str(self.__retries))
+            await asyncio.sleep(self.__backoff * 2 ** (attempts - 1))
+        if not ok:
+            self.__logger.error('Failed sending ' + job.label + ': ' + detail)
+        report.add(job, ok, detail, attempts)
@@ -62,4 +62,74 @@ def set_from_dict(objdict, maplist, value):
     :param maplist: Map list containing the keys
     :return: Updated dictionary objdict
     """
-    get_from_dict(objdict, maplist[:-1])[maplist[-1]] = value
\ No newline at end of file
+    get_from_dict(objdict, maplist[:-1])[maplist[-1]] = value
+
+
+class ClsGroupBy:
+    """ This class partitions dictionaries by the value of a key in a single pass.
+
+    The groups are kept in the order of their first dictionary, the dictionaries of
+    a group in the order they were added. Dictionaries can be added one after another
+    as they arrive. Instead of a dictionary, a value derived from it can be kept,
+    e.g. its json text. Dictionaries without the key are skipped.
+    """
+
+    def __init__(self, key):
+        self.__key = key
+        self.__groups = {}
+
+    @property
+    def groups(self):
+        """
+        :return: Dictionary of the key values and the lists of their dictionaries
+        """
+        return self.__groups
+
+    @property
+    def count(self):
+        """
+        :return: Number of the dictionaries in all groups
+        """
+        return sum(len(group) for group in self.__groups.values())
+
+    def add(self, item, value=None):
+        """
+        Add a dictionary to the group of its key value.
+        :param item: Dictionary
+        :param value: Value kept in the group instead of the dictionary, None - the dictionary is kept
+        """
+        try:
+            key_value = item[self.__key]
+        except KeyError:
+            return
+        if value is None:
+            value = item
+        group = self.__groups.get(key_value)
+        if group is None:
+            self.__groups[key_value] = [value]
+        else:
+            group.append(value)
+
+    def extend(self, items):
+        """
+        Add dictionaries to the groups of their key values.
+        :param items: Iterable of dictionaries
+        :return: The group by itself
+        """
+        for item in items:
+            self.add(item)
+        return self
+
+
+def group_by(items, key):
+    """
+    Partition dictionaries by the value of a key.
+
+    >>> group_by([{'c': 'a', 'n': 1}, {'c': 'b', 'n': 2}, {'n': 3}, {'c': 'a', 'n': 4}], 'c')
+    {'a': [{'c': 'a', 'n': 1}, {'c': 'a', 'n': 4}], 'b': [{'c': 'b', 'n': 2}]}
+
+    :param items: Iterable of dictionaries
+    :param key: Key to partition by
+    :return: Dictionary of the key values and the lists of their dictionaries, in the order of their first dictionary
+    """
+    return ClsGroupBy(key).extend(items).groups
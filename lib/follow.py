@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+FOLLOW_INTERVAL = 1  # seconds between two polls of the log files
+FOLLOW_LATENCY = 5  # seconds from appending a line to emitting its events at most
+FOLLOW_MAX_LINES = 100000  # lines collected at most before they are parsed
+
+
+class ClsLogFollower:
+    """ This class follows a log file for appended lines like tail -F.
+
+    The log file stays open between the polls and complete lines are read from the
+    current position, an incomplete last line is read again as a whole by the next poll.
+    The inode and the size of the log file path are polled: a new inode means the log
+    file was rotated, the rest of the rotated file is read before the new log file
+    is followed from its start. A size below the position means the log file was
+    truncated, it is followed from its start again.
+    """
+
+    def __init__(self, reader, logger):
+        """
+        :param reader: Parser object of the log file, which opens the file and creates the line records
+        :param logger: Logger of the log parser
+        :raises ValueError: The log file is compressed.
+        """
+        self.__reader = reader
+        self.__logger = logger
+        self.__path = reader.log_file_path
+        self.__line_break = reader.line_break
+        self.__fh = None
+        line_counter, offset, resumed = reader.follow_position()
+        self.open(line_counter, offset)
+        if not resumed:
+            self.read_lines(None)  # follow behind the existing lines
+        self.__logger.info('Follow the log file ' + self.__path + ' after line ' + str(self.__line_counter) + '.')
+
+    @property
+    def reader(self):
+        return self.__reader
+
+    @property
+    def position(self):
+        """
+        The position behind the last complete line read, like the read position of a parser run.
+        """
+        return {'line': self.__line_counter, 'offset': self.__offset}
+
+    def open(self, line_counter=0, offset=0):
+        """
+        Open the log file at a position.
+        :param line_counter: number of the line in front of the position
+        :param offset: byte offset of the position
+        """
+        fh = self.__reader.open_tail(offset)
+        self.close()
+        self.__fh = fh
+        self.__inode = os.fstat(fh.fileno()).st_ino
+        self.__line_counter = line_counter
+        self.__offset = offset
+        self.__incomplete = self.__line_break[:0]
+
+    def close(self):
+        if self.__fh:
+            self.__fh.close()
+            self.__fh = None
+
+    def read_lines(self, items):
+        """
+        Read the complete lines appended since the last read.
+        :param items: List, to which the line records are appended, None - the lines are skipped
+        """
+        self.__incomplete = self.__line_break[:0]
+        for line in iter(self.__fh.readline, self.__line_break[:0]):
+            if not line.endswith(self.__line_break):
+                self.__incomplete = line  # the rest of the line is not written yet
+                break
+            self.__line_counter += 1
+            if items is not None:
+                items.append(self.__reader.line_item(self.__line_counter, line))
+        self.__offset = self.__reader.read_offset(self.__fh, self.__incomplete)
+        if self.__incomplete:
+            # a character may be cut at the end of the file, its bytes are decoded with the rest of the line
+            self.__fh.seek(self.__offset)
+
+    def poll(self):
+        """
+        Read the lines appended to the log file since the last poll.
+        :return: List of line records
+        """
+        items = []
+        try:
+            stat = os.stat(self.__path)
+        except OSError:
+            stat = None  # rotated, the new log file is not created yet
+        self.read_lines(items)
+        if stat is None:
+            return items
+        if stat.st_ino != self.__inode:
+            if self.__incomplete:
+                # the rotated file is complete, its last line has no line break
+                self.__line_counter += 1
+                items.append(self.__reader.line_item(self.__line_counter, self.__incomplete))
+            self.__logger.info('The log file ' + self.__path + ' was rotated, follow the new log file.')
+        elif stat.st_size < self.__offset:
+            self.__logger.info('The log file ' + self.__path + ' was truncated, follow it from the start.')
+        else:
+            return items
+        try:
+            self.open()
+        except OSError:
+            return items  # replaced again in the meantime, retried by the next poll
+        self.read_lines(items)
+        return items
+
+
+class ClsFollowLoop:
+    """ This class polls log files for appended lines and hands them over in rounds.
+
+    The lines of several polls are collected into one round, so that the parsers and the
+    deliveries run less often, but not longer than the latency allows: a round is handed
+    over at the last poll, after which a line could have waited for longer than the latency.
+    Stopping the loop hands over the lines collected so far.
+    """
+
+    def __init__(self, followers, logger, interval=FOLLOW_INTERVAL, latency=FOLLOW_LATENCY,
+                 max_lines=FOLLOW_MAX_LINES):
+        """
+        :param followers: List of log followers
+        :param logger: Logger of the log parser
+        :param interval: Seconds between two polls, at most the latency
+        :param latency: Seconds from appending a line to handing it over at most, apart from the parsing time
+        :param max_lines: Number of collected lines, which are handed over without waiting for the latency
+        """
+        self.__followers = followers
+        self.__logger = logger
+        self.__interval = min(interval, latency)
+        self.__latency = latency
+        self.__max_lines = max_lines
+        self.__stopped = threading.Event()
+
+    def stop(self):
+        """
+        Stop the loop after the current poll, e.g. from a signal handler.
+        """
+        self.__stopped.set()
+
+    def run(self, emit):
+        """
+        Poll the log files until the loop is stopped.
+        :param emit: Function called with a list of tuples (log follower, line records) for every round
+        """
+        collected = [[] for _ in self.__followers]
+        since = None  # time, from which on the collected lines may have been appended
+        last_poll = time.monotonic()
+        while True:
+            stopping = self.__stopped.is_set()
+            now = time.monotonic()
+            for follower, items in zip(self.__followers, collected):
+                items.extend(follower.poll())
+            lines_number = sum(len(items) for items in collected)
+            if lines_number and since is None:
+                since = last_poll
+            last_poll = now
+            if lines_number and (stopping or lines_number >= self.__max_lines or
+                                 now + self.__interval - since > self.__latency):
+                self.__logger.debug('{} {}'.format('Lines appended to the log files:', lines_number))
+                emit([(follower, items) for follower, items in zip(self.__followers, collected) if items])
+                collected = [[] for _ in self.__followers]
+                since = None
+            if stopping:
+                break
+            self.__stopped.wait(max(self.__interval - (time.monotonic() - now), 0))
+        for follower in self.__followers:
+            follower.close()
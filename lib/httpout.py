@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import select
+import threading
+import http.client
+import delivery
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+HTTP_TIMEOUT = 30  # seconds to wait for a connection or a response
+# errors of sending a request over a kept alive connection closed by the server,
+# the request has not been received and is repeated on a new connection
+HTTP_RECONNECT_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError,
+                         BrokenPipeError)
+# errors of a failed request
+HTTP_ERRORS = (OSError, http.client.HTTPException)
+HTTP_BATCH_MAX_BYTES = 1024 * 1024  # maximum size of a batch of events before compression
+HTTP_GZIP_LEVEL = 6  # compression level of gzip request bodies
+TOKEN_EXPIRY_MARGIN = 60  # seconds a cached token must be valid beyond now to be used
+
+
+def batches(bodies, max_events=0, max_bytes=HTTP_BATCH_MAX_BYTES):
+    """
+    Split json bodies into batches, which are sent as json arrays.
+    A batch contains at least one body, even if the body exceeds max_bytes.
+    :param bodies: List of json strings
+    :param max_events: Maximum number of bodies per batch, 0 - no limit
+    :param max_bytes: Maximum size of the json array of a batch
+    :return: List of the batches, lists of json strings
+    """
+    result = []
+    batch = []
+    size = 2  # brackets of the array
+    for body in bodies:
+        if batch and ((max_events and len(batch) >= max_events) or size + len(body) + 1 > max_bytes):
+            result.append(batch)
+            batch = []
+            size = 2
+        batch.append(body)
+        size += len(body) + 1  # body and separator
+    if batch:
+        result.append(batch)
+    return result
+
+
+class ClsHttpPool:
+    """ This class is a pool of persistent HTTP connections.
+
+    Connections are kept alive per protocol, host and port, so that consecutive
+    requests to the same host share the TCP (and TLS) connection instead of opening
+    a new one for every request. The connections are described by the entries
+    of the connections file (protocol, hostName, port).
+
+    The pool can be used by several threads: a request takes an idle connection
+    to the host or opens a new one and returns it to the pool afterwards.
+    """
+
+    def __init__(self, timeout=HTTP_TIMEOUT):
+        self.__timeout = timeout
+        self.__idle = {}  # idle connections by protocol, host and port
+        self.__lock = threading.Lock()
+        self.__requests = 0
+        self.__connects = 0
+
+    @property
+    def statistics(self):
+        return {'idle': sum(len(c) for c in self.__idle.values()), 'requests': self.__requests,
+                'connects': self.__connects}
+
+    def configure(self, timeout=HTTP_TIMEOUT):
+        """
+        Set the timeout of new connections.
+        :param timeout: Seconds to wait for a connection or a response
+        """
+        self.__timeout = timeout
+
+    @staticmethod
+    def key(con):
+        return con['protocol'].lower(), con['hostName'], int(con['port'])
+
+    def acquire(self, key):
+        """
+        Take an idle connection to a host or create a new one.
+        :param key: Tuple (protocol, host, port)
+        :return: http.client.HTTPConnection or HTTPSConnection
+        """
+        with self.__lock:
+            idle = self.__idle.get(key)
+            if idle:
+                return idle.pop()
+        if key[0] == 'https':
+            return http.client.HTTPSConnection(key[1], key[2], timeout=self.__timeout)
+        return http.client.HTTPConnection(key[1], key[2], timeout=self.__timeout)
+
+    @staticmethod
+    def is_dropped(conn):
+        """
+        Check if the server has closed an idle connection. An idle connection is readable
+        only if the server has closed it (or sent data, which is no response to a request).
+        :param conn: Connection
+        :return: True if the connection cannot be used any longer
+        """
+        try:
+            return bool(select.select([conn.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def release(self, key, conn):
+        """
+        Return a connection to the pool.
+        :param key: Tuple (protocol, host, port)
+        :param conn: Connection
+        """
+        with self.__lock:
+            self.__idle.setdefault(key, []).append(conn)
+
+    def request(self, con, method, path, body=None, headers=None):
+        """
+        Send a request over a kept alive connection to the host of a connection entry.
+        An idle connection closed by the server in the meantime is replaced by a new one.
+        If sending the request over a kept alive connection fails, it is repeated once on
+        a new connection. A request is never repeated after it has been sent, as the server
+        may have accepted it already. The timeout of the pool applies to the connection and
+        every read of the response.
+
+        :param con: Connection from connections file
+        :param method: HTTP method, e.g. 'POST'
+        :param path: Path of the url
+        :param body: Request body, string or bytes
+        :param headers: Dictionary of request headers
+        :return: Tuple (status, reason, response text)
+        :raises delivery.ClsConnectError: The host cannot be reached, the request has not been sent.
+        :raises OSError: The connection failed or the host does not respond after sending the request.
+        :raises http.client.HTTPException: The response is invalid.
+        """
+        key = self.key(con)
+        conn = self.acquire(key)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        while True:
+            if conn.sock is not None and self.is_dropped(conn):
+                conn.close()
+            reused = conn.sock is not None
+            if not reused:
+                try:
+                    conn.connect()
+                except OSError as e:
+                    conn.close()
+                    raise delivery.ClsConnectError(str(e) or e.__class__.__name__) from e
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+            except HTTP_RECONNECT_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                continue  # closed by the server while idle, repeat on a new connection
+            except HTTP_ERRORS:
+                conn.close()
+                raise
+            try:
+                response = conn.getresponse()
+                text = response.read().decode('utf-8', errors='replace')
+            except HTTP_ERRORS:
+                conn.close()
+                raise  # sent, the request may have been accepted
+            with self.__lock:
+                self.__requests += 1
+                if not reused:
+                    self.__connects += 1
+            self.release(key, conn)
+            return response.status, response.reason, text
+
+    def close(self):
+        """
+        Close all idle connections of the pool.
+        """
+        with self.__lock:
+            for idle in self.__idle.values():
+                for conn in idle:
+                    conn.close()
+            self.__idle = {}
+
+
+class ClsTokenCache:
+    """ This class is a cache of the authentication tokens of the connections.
+
+    A token is kept per connection id and user name until it expires (expires_in of the token
+    response) minus a safety margin. Optionally the tokens are kept in a file, readable
+    by the owner only, so that later runs can use them as well. Tokens without expires_in
+    are used for the current run only.
+    """
+
+    def __init__(self, file_path=None, margin=TOKEN_EXPIRY_MARGIN):
+        self.__file_path = file_path
+        self.__margin = margin
+        self.__entries = None
+        self.__lock = threading.Lock()  # only one request for a new token at a time
+
+    def configure(self, file_path=None, margin=TOKEN_EXPIRY_MARGIN):
+        """
+        Set the token file, the tokens are loaded again on next use.
+        :param file_path: Path of the token file or None
+        :param margin: Seconds a cached token must be valid beyond now to be used
+        """
+        self.__file_path = file_path
+        self.__margin = margin
+        self.__entries = None
+
+    @staticmethod
+    def key(con):
+        return str(con.get('id')) + '/' + str(con.get('userName'))
+
+    def token(self, con, fetch):
+        """
+        Get the access token of a connection.
+        :param con: Connection from connections file
+        :param fetch: Function getting a new token response (json text) for the connection
+        :return: Access token string
+        :raises ValueError: The token response is no valid json.
+        :raises KeyError: The token response contains no access token.
+        """
+        with self.__lock:
+            return self.cached_token(con, fetch)
+
+    def cached_token(self, con, fetch):
+        if self.__entries is None:
+            self.__entries = self.load()
+        entry = self.__entries.get(self.key(con))
+        if entry and (entry['expires'] is None or entry['expires'] > time.time() + self.__margin):
+            return entry['accessToken']
+        json_token = json.loads(fetch(con))  # contains multiple token parameters
+        expires = None
+        if isinstance(json_token.get('expires_in'), (int, float)):
+            expires = time.time() + json_token['expires_in']
+        self.__entries[self.key(con)] = {'accessToken': json_token['access_token'], 'expires': expires}
+        if expires is not None:
+            self.save()
+        return json_token['access_token']
+
+    def invalidate(self, con, access_token):
+        """
+        Drop the token of a connection after it has been rejected.
+        The token is kept, if it has been replaced by a new one in the meantime.
+        :param con: Connection from connections file
+        :param access_token: Rejected access token
+        """
+        with self.__lock:
+            entry = (self.__entries or {}).get(self.key(con))
+            if entry and entry['accessToken'] == access_token:
+                del self.__entries[self.key(con)]
+                self.save()
+
+    def load(self):
+        """
+        Load the tokens of the token file.
+        :return: Dictionary of the tokens by key
+        """
+        if not self.__file_path:
+            return {}
+        try:
+            with open(self.__file_path, 'r') as fh:
+                entries = json.load(fh)
+            return {k: v for k, v in entries.items() if v.get('expires') and v.get('accessToken')}
+        except (OSError, ValueError, AttributeError):
+            return {}  # no or invalid token file
+
+    def save(self):
+        """
+        Write the tokens with expiry to the token file, readable by the owner only.
+        """
+        if not self.__file_path:
+            return
+        entries = {k: v for k, v in self.__entries.items() if v['expires'] is not None}
+        tmp_path = self.__file_path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(entries, fh)
+            os.replace(tmp_path, self.__file_path)
+        except OSError:
+            pass  # the token file is optional
+
+
+# pool and tokens of the process, shared by all parsers
+POOL = ClsHttpPool()
+TOKENS = ClsTokenCache()
@@ -0,0 +1,124 @@
+import gzip
+import json
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+FORMAT_JSON = 'json'  # json array, pretty printed
+FORMAT_JSON_LINES = 'jsonl'  # one json event per line
+JSON_INDENT = 4
+
+
+class ClsJsonWriter:
+    """ This class writes events to a file as they are added.
+
+    Events are written one by one, the file is never built as a whole in memory.
+    The format is either JSON Lines (one event per line) or a pretty printed
+    json array, identical to json.dumps(events, sort_keys=True, indent=4).
+    Optionally the file is gzip compressed.
+    """
+
+    def __init__(self, file_path, file_format=FORMAT_JSON, compress=False):
+        """
+        :param file_path: Path of the file
+        :param file_format: FORMAT_JSON or FORMAT_JSON_LINES
+        :param compress: True - the file is gzip compressed
+        :raises ValueError: Unknown format.
+        """
+        if file_format not in (FORMAT_JSON, FORMAT_JSON_LINES):
+            raise ValueError('Unknown output format: ' + str(file_format))
+        self.__file_path = file_path
+        self.__format = file_format
+        if compress:
+            self.__fh = gzip.open(file_path, 'wt', encoding='utf-8')
+        else:
+            self.__fh = open(file_path, 'w')
+        self.__count = 0
+
+    @property
+    def name(self):
+        return self.__file_path
+
+    @property
+    def count(self):
+        return self.__count
+
+    def write(self, event):
+        """
+        Write one event.
+        :param event: Event dictionary
+        """
+        if self.__format == FORMAT_JSON_LINES:
+            self.__fh.write(json.dumps(event, sort_keys=True) + '\n')
+        else:
+            # array elements are indented by one level, json strings contain no line breaks
+            text = json.dumps(event, sort_keys=True, indent=JSON_INDENT).replace('\n', '\n' + JSON_INDENT * ' ')
+            self.__fh.write(('[\n' if self.__count == 0 else ',\n') + JSON_INDENT * ' ' + text)
+        self.__count += 1
+
+    def extend(self, events):
+        """
+        Write events.
+        :param events: Iterable of event dictionaries
+        """
+        for event in events:
+            self.write(event)
+
+    def flush(self):
+        """
+        Write the buffered events to the file, e.g. at the end of a follow round (--follow).
+        """
+        self.__fh.flush()
+
+    def close(self):
+        if self.__format == FORMAT_JSON:
+            self.__fh.write('[]\n' if self.__count == 0 else '\n]\n')
+        self.__fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ClsJsonWriterCache:
+    """ This class keeps json writers open for several runs.
+
+    While following the log files (--follow), every round writes to the files of the run
+    before instead of rewriting them. A file is opened by the first run writing to it
+    and all files are closed together.
+    """
+
+    def __init__(self):
+        self.__writers = {}  # json writers by file path
+
+    def open(self, file_path, file_format=FORMAT_JSON, compress=False):
+        """
+        Get the json writer of a file, open it if it is not open yet.
+        :param file_path: Path of the file
+        :param file_format: FORMAT_JSON or FORMAT_JSON_LINES
+        :param compress: True - the file is gzip compressed
+        :return: Json writer
+        """
+        writer = self.__writers.get(file_path)
+        if writer is None:
+            writer = self.__writers[file_path] = ClsJsonWriter(file_path, file_format, compress)
+        return writer
+
+    def flush(self):
+        for writer in self.__writers.values():
+            writer.flush()
+
+    def close(self):
+        for writer in self.__writers.values():
+            writer.close()
+        self.__writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,211 @@
+import os
+import json
+import zlib
+import bisect
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+LINE_INDEX_STEP = 1000  # one index entry every n lines
+LINE_INDEX_EXT = '.lidx'  # extension of the index sidecar file
+LINE_INDEX_HEAD_LEN = 1024  # number of bytes at the start of file used as fingerprint
+LINE_INDEX_BLOCK_SIZE = 1024 * 1024  # number of bytes read at once while indexing
+
+
+def head_checksum(fh, head_len):
+    """
+    Calculate the fingerprint of the first bytes of a log file.
+    :param fh: log file opened in binary mode
+    :param head_len: number of bytes to check
+    :return: checksum of the first head_len bytes
+    """
+    fh.seek(0)
+    return zlib.crc32(fh.read(head_len))
+
+
+class ClsLineIndex:
+    """ This class is a sparse index of a log file.
+
+    It maps line numbers to byte offsets, with one entry every step lines,
+    and persists the entries in a sidecar file. The index is updated incrementally
+    while the log file grows and rebuilt, if the log file was truncated or rotated.
+    Lines are delimited by newline characters.
+    """
+
+    def __init__(self, file_path, index_path, step=LINE_INDEX_STEP):
+        self.__file_path = file_path
+        self.__index_path = index_path
+        self.__step = step
+        self.__changed = False
+        self.reset()
+        self.load()
+
+    @property
+    def index_path(self):
+        return self.__index_path
+
+    @property
+    def step(self):
+        return self.__step
+
+    @property
+    def lines_number(self):
+        """
+        The number of lines of the indexed log file,
+        including a last line without line break.
+        """
+        if self.__tail:
+            return self.__lines + 1
+        else:
+            return self.__lines
+
+    @property
+    def size(self):
+        return self.__end + self.__tail
+
+    @property
+    def inode(self):
+        return self.__inode
+
+    def reset(self):
+        """
+        Discard all index entries.
+        """
+        self.__inode = None
+        self.__head = None
+        self.__head_len = 0
+        self.__offsets = [0]  # offset of line 1, 1 + step, 1 + 2 * step, ..
+        self.__lines = 0  # number of complete lines
+        self.__end = 0  # offset behind the last complete line
+        self.__tail = 0  # number of bytes of the last line without line break
+        self.__changed = True
+
+    def load(self):
+        """
+        Load the index from the sidecar file, if it exists and fits to the step.
+        :return: True if the index was loaded
+        """
+        try:
+            with open(self.__index_path, 'r') as fh:
+                d = json.load(fh)
+            if d['step'] != self.__step:
+                return False
+            self.__inode = d['inode']
+            self.__head = d['head']
+            self.__head_len = d['headLen']
+            self.__offsets = d['offsets']
+            self.__lines = d['lines']
+            self.__end = d['end']
+            self.__tail = 0
+            self.__changed = False
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()
+            return False
+
+    def save(self):
+        """
+        Write the index into the sidecar file, if it has changed.
+        The file is replaced atomically, also if several processes update the index.
+        :return: True if the index was written
+        """
+        if not self.__changed:
+            return False
+        d = {'file': self.__file_path, 'step': self.__step, 'inode': self.__inode,
+             'head': self.__head, 'headLen': self.__head_len,
+             'offsets': self.__offsets, 'lines': self.__lines, 'end': self.__end}
+        tmp_path = self.__index_path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fh:
+                json.dump(d, fh)
+            os.replace(tmp_path, self.__index_path)
+        except OSError:
+            return False
+        self.__changed = False
+        return True
+
+    def is_valid(self, fh, stat):
+        """
+        Check if the index still describes the log file.
+        The index gets invalid if the log file was rotated (new inode)
+        or truncated (smaller size, different first bytes).
+        :param fh: log file opened in binary mode
+        :param stat: os.stat_result of the log file
+        :return: True if the index entries can be kept
+        """
+        if self.__inode != stat.st_ino:
+            return False
+        if stat.st_size < self.__end:
+            return False
+        if self.__head_len and head_checksum(fh, self.__head_len) != self.__head:
+            return False
+        return True
+
+    def update(self):
+        """
+        Bring the index up to date by indexing the lines appended since the last update.
+        :return: The index itself
+        """
+        with open(self.__file_path, 'rb') as fh:
+            stat = os.fstat(fh.fileno())
+            if not self.is_valid(fh, stat):
+                self.reset()
+                self.__inode = stat.st_ino
+            if self.__head_len < LINE_INDEX_HEAD_LEN and self.__head_len < stat.st_size:
+                self.__head_len = min(LINE_INDEX_HEAD_LEN, stat.st_size)
+                self.__head = head_checksum(fh, self.__head_len)
+                self.__changed = True
+            fh.seek(self.__end)
+            self.__tail = 0
+            pos = self.__end
+            while True:
+                block = fh.read(LINE_INDEX_BLOCK_SIZE)
+                if not block:
+                    break
+                self.add_block(block, pos)
+                pos += len(block)
+            self.__tail = pos - self.__end
+        return self
+
+    def add_block(self, block, pos):
+        """
+        Add the line breaks of a block of bytes to the index.
+        :param block: bytes read from the log file
+        :param pos: offset of the block in the log file
+        """
+        n = block.count(b'\n')
+        if not n:
+            return
+        i = -1
+        # line count at which the next index entry is due
+        next_mark = len(self.__offsets) * self.__step
+        while self.__lines + n >= next_mark:
+            for _ in range(next_mark - self.__lines):
+                i = block.find(b'\n', i + 1)
+            n -= next_mark - self.__lines
+            self.__lines = next_mark
+            self.__offsets.append(pos + i + 1)
+            next_mark += self.__step
+        self.__lines += n
+        self.__end = pos + block.rfind(b'\n') + 1
+        self.__changed = True
+
+    def locate(self, offset):
+        """
+        Get the nearest indexed line in front of a byte offset.
+        :param offset: byte offset in the log file
+        :return: Tuple (line number, byte offset) of the nearest indexed line
+        """
+        i = bisect.bisect_right(self.__offsets, offset) - 1
+        return i * self.__step + 1, self.__offsets[i]
+
+    def seek(self, line_no):
+        """
+        Get the nearest indexed line in front of a line.
+        :param line_no: line number of the log file
+        :return: Tuple (line number, byte offset) of the nearest indexed line
+        """
+        i = min(max(line_no - 1, 0) // self.__step, len(self.__offsets) - 1)
+        return i * self.__step + 1, self.__offsets[i]
@@ -0,0 +1,339 @@
+import io
+import os
+import bz2
+import gzip
+import json
+import lzma
+import mmap
+import zlib
+import bisect
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+COMPRESSION_GZIP = 'gz'
+COMPRESSION_BZIP2 = 'bz2'
+COMPRESSION_XZ = 'xz'
+# first bytes of the compressed formats, bzip2 is followed by the block size digit
+COMPRESSION_MAGIC = [(b'\x1f\x8b', COMPRESSION_GZIP), (b'BZh', COMPRESSION_BZIP2), (b'\xfd7zXZ\x00', COMPRESSION_XZ)]
+COMPRESSION_MAGIC_SIZE = max(len(magic) for magic, name in COMPRESSION_MAGIC)  # bytes needed to tell the formats
+BZIP2_BLOCK_SIZES = b'123456789'
+MEMBER_INDEX_STEP = 1000  # one access point at most every n lines
+MEMBER_INDEX_EXT = '.zidx'  # extension of the index sidecar file
+MEMBER_INDEX_BLOCK_SIZE = 1024 * 1024  # number of bytes read at once while indexing
+ASCII_BYTES = bytes(range(128))
+LINE_START_BLOCK_SIZE = 64 * 1024  # number of bytes read at once while searching back for a line break
+
+
+def compression(file_path):
+    """
+    Get the compression of a log file by its first bytes.
+    :param file_path: Path of the log file
+    :return: COMPRESSION_GZIP, COMPRESSION_BZIP2, COMPRESSION_XZ or None, if the file is not compressed
+    """
+    try:
+        with open(file_path, 'rb') as fh:
+            head = fh.read(COMPRESSION_MAGIC_SIZE)
+    except OSError:
+        return None
+    return head_compression(head)
+
+
+def head_compression(head):
+    """
+    Get the compression of a stream member by its first bytes.
+    A text starting with the bzip2 magic is no bzip2 stream without the block size digit.
+    :param head: First bytes of the stream member, at least COMPRESSION_MAGIC_SIZE bytes if available
+    :return: COMPRESSION_GZIP, COMPRESSION_BZIP2, COMPRESSION_XZ or None, if the bytes are not compressed
+    """
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            if name == COMPRESSION_BZIP2 and not (len(head) > len(magic) and head[len(magic)] in BZIP2_BLOCK_SIZES):
+                return None
+            return name
+    return None
+
+
+def decompressor(file_compression):
+    """
+    Create a decompressor for one stream member of a compressed file.
+    :param file_compression: Compression of the file
+    :return: Decompressor object with decompress(), eof and unused_data
+    """
+    if file_compression == COMPRESSION_GZIP:
+        return zlib.decompressobj(wbits=31)
+    if file_compression == COMPRESSION_BZIP2:
+        return bz2.BZ2Decompressor()
+    return lzma.LZMADecompressor()
+
+
+def ascii_compatible(encoding):
+    """
+    Check if an encoding encodes the ASCII characters as single bytes of the same value,
+    like utf-8 or the iso-8859 and windows code pages. Bytes patterns built from ASCII
+    regular expressions match the lines of such log files without decoding them.
+    :param encoding: Text encoding
+    :return: True if the encoding is ASCII compatible
+    """
+    try:
+        return ASCII_BYTES.decode(encoding) == ASCII_BYTES.decode('ascii')
+    except (LookupError, ValueError):
+        return False
+
+
+def line_break_bytes(encoding):
+    """
+    Get the line break in an encoding, without a byte order mark.
+    :param encoding: Text encoding
+    :return: Encoded line break
+    """
+    return 'a\n'.encode(encoding)[len('a'.encode(encoding)):]
+
+
+def line_start(fd, end, encoding):
+    """
+    Get the byte offset of the line reaching to a position of an uncompressed log file
+    by searching back for the line break in front of it. The bytes are read without
+    moving the file position, so that a file object of the descriptor can go on reading.
+    :param fd: File descriptor of the log file
+    :param end: Byte offset within the line, e.g. the end of an incomplete last line
+    :param encoding: Text encoding of the log file
+    :return: Byte offset of the line
+    """
+    line_break = line_break_bytes(encoding)
+    pos = end
+    while pos > 0:
+        start = max(pos - LINE_START_BLOCK_SIZE, 0)
+        # overlap with the block behind, which may hold the rest of a line break
+        data = os.pread(fd, min(pos + len(line_break) - 1, end) - start, start)
+        i = data.rfind(line_break)
+        if i >= 0:
+            return start + i + len(line_break)
+        pos = start
+    return 0
+
+
+class ClsDecompressedFile(io.TextIOWrapper):
+    """ This class is a compressed log file opened for reading text.
+
+    The file is decompressed while reading. Closing it closes the compressed file as well.
+    """
+
+    def __init__(self, raw, file_compression, encoding=None, errors=None):
+        """
+        :param raw: Compressed file opened in binary mode, positioned at the start of a stream member
+        :param file_compression: Compression of the file
+        :param encoding: Text encoding, default is the encoding of open()
+        :param errors: Handling of invalid bytes, default is 'strict'
+        """
+        self.__raw = raw
+        if file_compression == COMPRESSION_GZIP:
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif file_compression == COMPRESSION_BZIP2:
+            stream = bz2.BZ2File(raw)
+        else:
+            stream = lzma.LZMAFile(raw)
+        io.TextIOWrapper.__init__(self, stream, encoding=encoding, errors=errors)
+
+    def close(self):
+        try:
+            io.TextIOWrapper.close(self)
+        finally:
+            self.__raw.close()
+
+
+def open_text(file_path, offset=0, file_compression=None, encoding=None, errors=None):
+    """
+    Open a log file for reading text at a byte offset.
+    :param file_path: Path of the log file
+    :param offset: Byte offset, for compressed files the offset of a stream member
+    :param file_compression: Compression of the file as provided by compression()
+    :param encoding: Text encoding, default is the encoding of open()
+    :param errors: Handling of invalid bytes, default is 'strict'
+    :return: File object
+    """
+    if not file_compression:
+        fh = open(file_path, 'r', encoding=encoding, errors=errors)
+        fh.seek(offset)
+        return fh
+    raw = open(file_path, 'rb')
+    try:
+        raw.seek(offset)
+        return ClsDecompressedFile(raw, file_compression, encoding, errors)
+    except Exception:
+        raw.close()
+        raise
+
+
+def open_mapped(file_path, offset=0):
+    """
+    Map an uncompressed log file into memory for reading lines as bytes at a byte offset.
+    The lines are neither decoded nor copied into a read buffer, readline() returns
+    the bytes of a line including its line break. Lines appended to the log file
+    after mapping it are not read.
+    :param file_path: Path of the log file
+    :param offset: Byte offset
+    :return: Memory map with readline(), tell() and close(), an empty file object for an empty log file
+    """
+    with open(file_path, 'rb') as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if not size:
+            return io.BytesIO()  # an empty file cannot be mapped
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)  # the map stays valid after closing the file
+    mm.seek(min(offset, size))
+    return mm
+
+
+class ClsMemberIndex:
+    """ This class is a sparse index of a compressed log file.
+
+    Compressed files can only be read from the start of a stream member
+    (gzip member, bzip2 or xz stream). Archives concatenated from several members,
+    e.g. written block wise or appended run by run, are indexed at the members starting
+    with a new line, at most one access point every step lines. Later chunks are read
+    from the nearest access point in front of them instead of decompressing the whole archive.
+    A compressed file is not changed, so the index is rebuilt only if the file is replaced.
+    """
+
+    def __init__(self, file_path, index_path, file_compression, step=MEMBER_INDEX_STEP):
+        self.__file_path = file_path
+        self.__index_path = index_path
+        self.__compression = file_compression
+        self.__step = step
+        self.__changed = False
+        self.reset()
+        self.load()
+
+    @property
+    def index_path(self):
+        return self.__index_path
+
+    @property
+    def lines_number(self):
+        """
+        The number of lines of the decompressed log file,
+        including a last line without line break.
+        """
+        return self.__lines + (1 if self.__tail else 0)
+
+    @property
+    def points(self):
+        return len(self.__offsets)
+
+    def reset(self):
+        """
+        Discard all index entries.
+        """
+        self.__fingerprint = None
+        self.__line_numbers = [0]  # number of the lines in front of the access points
+        self.__offsets = [0]  # byte offsets of the access points
+        self.__lines = 0  # number of complete lines
+        self.__tail = False  # True if the last line has no line break
+        self.__changed = True
+
+    @staticmethod
+    def fingerprint(file_path):
+        stat = os.stat(file_path)
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def load(self):
+        """
+        Load the index from the sidecar file, if it exists and fits to the step.
+        :return: True if the index was loaded
+        """
+        try:
+            with open(self.__index_path, 'r') as fh:
+                d = json.load(fh)
+            if d['step'] != self.__step:
+                return False
+            self.__fingerprint = d['fingerprint']
+            self.__line_numbers = d['lineNumbers']
+            self.__offsets = d['offsets']
+            self.__lines = d['lines']
+            self.__tail = d['tail']
+            self.__changed = False
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()
+            return False
+
+    def save(self):
+        """
+        Write the index into the sidecar file, if it has changed.
+        :return: True if the index was written
+        """
+        if not self.__changed:
+            return False
+        d = {'file': self.__file_path, 'step': self.__step, 'fingerprint': self.__fingerprint,
+             'lineNumbers': self.__line_numbers, 'offsets': self.__offsets, 'lines': self.__lines,
+             'tail': self.__tail}
+        tmp_path = self.__index_path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fh:
+                json.dump(d, fh)
+            os.replace(tmp_path, self.__index_path)
+        except OSError:
+            return False
+        self.__changed = False
+        return True
+
+    def update(self):
+        """
+        Build the index, if the compressed file has been replaced since the index was built.
+        :return: The index itself
+        """
+        fingerprint = self.fingerprint(self.__file_path)
+        if fingerprint != self.__fingerprint:
+            self.reset()
+            self.build()
+            self.__fingerprint = fingerprint
+        return self
+
+    def build(self):
+        """
+        Decompress the file once, count its lines and record the access points.
+        Data behind the last stream member, which is no further member (e.g. padding), is ignored.
+        """
+        d = decompressor(self.__compression)
+        pos = 0  # offset of the data passed to the decompressor
+        last = b'\n'  # last decompressed byte
+        with open(self.__file_path, 'rb') as fh:
+            while True:
+                data = fh.read(MEMBER_INDEX_BLOCK_SIZE)
+                if not data:
+                    break
+                while data:
+                    out = d.decompress(data)
+                    if out:
+                        self.__lines += out.count(b'\n')
+                        last = out[-1:]
+                    if not d.eof:
+                        pos += len(data)
+                        break
+                    # end of the stream member, the next member starts behind it
+                    pos += len(data) - len(d.unused_data)
+                    data = d.unused_data
+                    if len(data) < COMPRESSION_MAGIC_SIZE:
+                        # the member ends at the end of the block, the magic of the next one may be cut
+                        data += fh.read(MEMBER_INDEX_BLOCK_SIZE)
+                    if not head_compression(data):
+                        data = b''
+                        fh.seek(0, os.SEEK_END)  # no further member
+                        break
+                    if last == b'\n' and self.__lines - self.__line_numbers[-1] >= self.__step:
+                        self.__line_numbers.append(self.__lines)
+                        self.__offsets.append(pos)
+                    d = decompressor(self.__compression)
+        self.__tail = last != b'\n'
+        self.__changed = True
+
+    def seek(self, line_no):
+        """
+        Get the nearest access point in front of a line.
+        :param line_no: line number of the log file
+        :return: Tuple (number of the first line, byte offset) of the access point
+        """
+        i = max(bisect.bisect_left(self.__line_numbers, line_no) - 1, 0)
+        return self.__line_numbers[i] + 1, self.__offsets[i]
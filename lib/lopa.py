@@ -1,16 +1,36 @@
 import time
 import datetime
-import re
 import json
+import gzip
 import dicttools
+import lineindex
+import checkpoint
+import prefilter
+import rxregistry
+import render
+import tstamp
+import timeseek
+import logreader
+import shards
+import httpout
+import delivery
+import mailout
+import os
+import mmap
+import locale
 import platform
 import socket
-import copy
 import sys
 import pprint
-from operator import itemgetter
-from subprocess import Popen, PIPE  # for cURL data sending
-import smtplib  # for the actual sending function
+import itertools
+import functools
+import logging
+import concurrent.futures
+import threading
+import urllib.parse
+import smtplib
+from operator import attrgetter, itemgetter
+from collections import deque
 from email.mime.text import MIMEText  # email module
 
 __author__ = 'Ralf'
@@ -23,7 +43,9 @@ LOG_MAX_TEXT_LEN = 80
 KEY_KEYS = 'keys'
 CONFIG_FILE = './config/logparser.yml'
 CONN_FILE = './config/connections.yml'
+INDEX_PATH = './cache'  # directory of the line index files, which time ordered logs keep without index.pathName
 VAR_DELIMITER = '%'
+ENV_LOOKUP_TIMEOUT = 2  # seconds to wait for the reverse lookup of the host name
 #  placeholders
 PH_DATE = '%dt%'
 PH_DATE_NOW = '%dtNow%'
@@ -46,6 +68,78 @@ PH_PYTHON_COMPILER = '%pythonCompiler%'
 PH_PYTHON_VERSION = '%pythonVersion%'
 PH_PYTHON_IMPLEMENTATION = '%pythonImplementation%'
 PH_PYTHON_SCRIPT = '%pythonScript%'
+PH_NAMES = [PH_DATE, PH_DATE_NOW, PH_BUSINESS_AREA, PH_CHUNK_KEY, PH_CONFIGFILE, PH_CUSTOMER_ID, PH_EVENT_STATUS,
+            PH_EVENT_DATE, PH_EVENT_MESSAGE, PH_ENVIRONMENT, PH_PARSER_ID, PH_PARSER_REGEX, PH_SOURCEFILE,
+            PH_SOURCE_LINE_NUM, PH_SOURCE_HOST, PH_SOURCE_HOST_SHORT, PH_SOURCE_SYSTEM, PH_PYTHON_COMPILER,
+            PH_PYTHON_VERSION, PH_PYTHON_IMPLEMENTATION, PH_PYTHON_SCRIPT]
+#  regular expressions
+RX_GROUP_SLICE = rxregistry.REGISTRY.pattern(r'(-?\d*):(-?\d*):(\d*)')
+#  placeholder names including key (%k1%) and regex group (%g1%) placeholders and their lower and upper case variants
+RX_PLACEHOLDER = rxregistry.REGISTRY.pattern(VAR_DELIMITER + '(?:' + '|'.join(ph.strip(VAR_DELIMITER) for ph in PH_NAMES) +
+                                             r'|[kg]\d+)(?:\.lower|\.upper)?' + VAR_DELIMITER)
+#  parts of a placeholder: name, key or regex group and case conversion
+RX_PLACEHOLDER_PARTS = rxregistry.REGISTRY.pattern(VAR_DELIMITER + r'(([kg]\d+)|[^.%]+)(?:\.(lower|upper))?' +
+                                                   VAR_DELIMITER)
+
+
+class ClsLine:
+    """ This class is a compact record of one line of the logfile.
+
+    It is used instead of a dictionary to keep the memory per line low,
+    as a record is created for every line read.
+    """
+
+    __slots__ = ('number', 'date', 'text')
+
+    def __init__(self, number, date, text):
+        self.number = number
+        self.date = date
+        self.text = text
+
+    def as_dict(self):
+        return {'number': self.number, 'date': self.date, 'text': self.text}
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+
+class ClsEvent:
+    """ This class is a compact record of one normalized combi item (event).
+
+    It refers to the search item it has been found for instead of copying
+    the keys of the search item.
+    """
+
+    __slots__ = ('search', 'number', 'date', 'status', 'text', 'message')
+
+    def __init__(self, search, number, date, status, text, message):
+        self.search = search
+        self.number = number
+        self.date = date
+        self.status = status
+        self.text = text
+        self.message = message
+
+    @property
+    def regex(self):
+        return self.search['regex']
+
+    @property
+    def rx(self):
+        return self.search['rx']
+
+    @property
+    def out(self):
+        return self.search['out']
+
+    def as_dict(self):
+        d = {k: v for k, v in self.search.items() if k != 'found'}
+        d.update({'number': self.number, 'date': self.date, 'status': self.status, 'text': self.text,
+                  'message': self.message})
+        return d
+
+    def __repr__(self):
+        return repr(self.as_dict())
 
 
 class ClsChunk:
@@ -78,14 +172,14 @@ class ClsChunk:
     @property
     def line_start(self):
         if self.__chunk:
-            return [('start', self.__chunk[0]['number'])]
+            return [('start', self.__chunk[0].number)]
         else:
             return None
 
     @property
     def line_end(self):
         if self.__chunk:
-            return [('end', self.__chunk[-1]['number'])]
+            return [('end', self.__chunk[-1].number)]
         else:
             return None
 
@@ -122,10 +216,10 @@ class ClsResList:
     def status_tuples(self):
         s_count = {}
         for r in self.__r_list:
-            if r['status'] not in s_count:
-                s_count[r['status']] = 1
+            if r.status not in s_count:
+                s_count[r.status] = 1
             else:
-                s_count[r['status']] += 1
+                s_count[r.status] += 1
         # sort keys for output
         s_list = []
         for k, v in s_count.items():
@@ -142,42 +236,184 @@ class ClsResList:
         :return: Filtered list of normalized combi items (events)
         """
         if status_list:
-            return [r for r in self.__r_list if r['status'] in status_list]
+            return [r for r in self.__r_list if r.status in status_list]
         else:
             return self.__r_list
 
 
+class ClsFoundBucket:
+    """ This class is a container for the found items of one search item.
+
+    It is initialized by the bounds of the group slice (selection.group.slice).
+    The slices of the last n items ('-n::') and the first n items (':n:')
+    are collected in bounded containers, so the memory does not grow with
+    the number of found items. Other slices are applied to the complete list.
+    """
+
+    def __init__(self, bounds):
+        self.__bounds = bounds
+        self.__limit = None
+        x, y, z = bounds
+        if z in (None, 1):
+            if x is not None and x < 0 and y is None:
+                self.__items = deque(maxlen=-x)  # last n items
+                self.__bounds = None
+            elif x in (None, 0) and y is not None and y >= 0:
+                self.__items = []
+                self.__limit = y  # first n items
+                self.__bounds = None
+            else:
+                self.__items = []
+        else:
+            self.__items = []
+
+    def add(self, item):
+        if self.__limit is None or len(self.__items) < self.__limit:
+            self.__items.append(item)
+
+    @property
+    def items(self):
+        """ The collected items before the slice is applied. """
+        return list(self.__items)
+
+    @property
+    def list(self):
+        if self.__bounds:
+            x, y, z = self.__bounds
+            return self.__items[x:y:z]
+        return list(self.__items)
+
+
 class ClsEnvTuples:
     """ This class is a container for environment information
     in form of tuples.
+
+    The environment is the same for all parsers of the process, so it is resolved once
+    (see ENV_TUPLES) on first use. The reverse lookup of the host name waits at most
+    lookup_timeout seconds. The resolved host names can be kept in a cache file
+    for later runs, the cache is used as long as the host name does not change.
     """
 
-    def __init__(self):
-        self.__list = []
-        if socket.gethostname().find('.') >= 0:
-            self.__list.append((PH_SOURCE_HOST, socket.gethostname()))
-            self.__list.append((PH_SOURCE_HOST_SHORT, socket.gethostname().split('.')[0]))
-        else:
-            self.__list.append((PH_SOURCE_HOST, socket.gethostbyaddr(socket.gethostname())[0]))
-            self.__list.append((PH_SOURCE_HOST_SHORT, socket.gethostname()))
-        self.__list.append((PH_SOURCE_SYSTEM, platform.system()))
-        self.__list.append((PH_PYTHON_COMPILER, platform.python_compiler()))
-        self.__list.append((PH_PYTHON_VERSION, platform.python_version()))
-        self.__list.append((PH_PYTHON_IMPLEMENTATION, platform.python_implementation()))
-        self.__list.append((PH_PYTHON_SCRIPT, sys.argv[0]))
+    def __init__(self, cache_file=None, lookup_timeout=ENV_LOOKUP_TIMEOUT):
+        self.__cache_file = cache_file
+        self.__lookup_timeout = lookup_timeout
+        self.__list = None
+
+    def configure(self, cache_file=None, lookup_timeout=ENV_LOOKUP_TIMEOUT):
+        """
+        Set the cache file and the lookup timeout, the environment is resolved again on next use.
+        :param cache_file: Path of the cache file of the host names or None
+        :param lookup_timeout: Seconds to wait for the reverse lookup of the host name
+        """
+        self.__cache_file = cache_file
+        self.__lookup_timeout = lookup_timeout
+        self.__list = None
+
+    def assign(self, tuples):
+        """
+        Take over the environment resolved by another process, e.g. by the main process for a worker.
+        :param tuples: List of tuples (placeholder, value)
+        """
+        self.__list = [tuple(t) for t in tuples]
 
     @property
     def list(self):
+        if self.__list is None:
+            self.__list = self.resolve()
         return self.__list
 
+    def resolve(self):
+        """
+        Resolve the environment information.
+        :return: List of tuples (placeholder, value)
+        """
+        host_name = socket.gethostname()
+        hosts = self.load_hosts(host_name)
+        if hosts is None:
+            if host_name.find('.') >= 0:
+                hosts = {'host': host_name, 'hostShort': host_name.split('.')[0]}
+            else:
+                hosts = {'host': self.reverse_lookup(host_name, self.__lookup_timeout), 'hostShort': host_name}
+            self.save_hosts(host_name, hosts)
+        return [(PH_SOURCE_HOST, hosts['host']), (PH_SOURCE_HOST_SHORT, hosts['hostShort']),
+                (PH_SOURCE_SYSTEM, platform.system()), (PH_PYTHON_COMPILER, platform.python_compiler()),
+                (PH_PYTHON_VERSION, platform.python_version()),
+                (PH_PYTHON_IMPLEMENTATION, platform.python_implementation()), (PH_PYTHON_SCRIPT, sys.argv[0])]
+
+    @staticmethod
+    def reverse_lookup(host_name, timeout):
+        """
+        Get the fully qualified host name by a reverse lookup.
+        The lookup runs in a daemon thread, so that a slow resolver does not block the process.
+        :param host_name: Host name
+        :param timeout: Seconds to wait for the lookup
+        :return: Fully qualified host name, the host name if the lookup fails or times out
+        """
+        result = []
+
+        def lookup():
+            try:
+                result.append(socket.gethostbyaddr(host_name)[0])
+            except OSError:
+                pass
+
+        thread = threading.Thread(target=lookup, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if result:
+            return result[0]
+        return host_name
+
+    def load_hosts(self, host_name):
+        """
+        Load the host names of the cache file.
+        :param host_name: Current host name
+        :return: Dictionary of the host names or None, if there is no cache for the host
+        """
+        if not self.__cache_file:
+            return None
+        try:
+            with open(self.__cache_file, 'r') as fh:
+                cache = json.load(fh)
+            if cache['hostName'] == host_name:
+                return {'host': cache['host'], 'hostShort': cache['hostShort']}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # no or invalid cache file, resolve again
+        return None
+
+    def save_hosts(self, host_name, hosts):
+        """
+        Write the host names to the cache file.
+        The file is replaced atomically, so concurrent processes read a complete file.
+        :param host_name: Current host name
+        :param hosts: Dictionary of the host names
+        """
+        if not self.__cache_file:
+            return
+        tmp_path = self.__cache_file + '.' + str(os.getpid()) + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fh:
+                json.dump(dict(hosts, hostName=host_name), fh)
+            os.replace(tmp_path, self.__cache_file)
+        except OSError:
+            pass  # the cache is optional
+
+
+# environment of the process, shared by all parsers
+ENV_TUPLES = ClsEnvTuples()
+
 
 class ClsParser:
     """ This class is a container for any parser instance.
      A parser is meant to do the parsing of
      a dedicated log object.
+
+     A parser object created with the run state of another parser object (see run_state)
+     takes part in the run of that parser, e.g. in a worker process. It neither indexes nor
+     counts the log file and leaves the checkpoint and the time seek to the other parser.
     """
 
-    def __init__(self, dict_log, dict_parser, logger):
+    def __init__(self, dict_log, dict_parser, logger, checkpoints=None, lines_number=None, run_state=None):
         # log
         self.__dict_log = dict_log
         self.__log_id = dict_log['id']
@@ -188,13 +424,44 @@ class ClsParser:
         self.__log_pathname = dict_log['pathName']
         self.__log_filename = dict_log['fileName']
         self.__log_file_path = dict_log['pathName'] + '/' + dict_log['fileName']
-        self.__log_file_lines_number = self.get_log_lines_number()
+        self.__log_compression = logreader.compression(self.__log_file_path)  # None - not compressed
+        d_read = dict_log.get('read') or {}
+        self.__log_encoding = d_read.get('encoding') or locale.getpreferredencoding(False)
+        self.__log_errors = d_read.get('errors') or 'strict'
+        self.__log_mmap = self.get_log_mmap()
+        self.__log_index = None if run_state else self.get_log_index()
+        self.__log_shards = self.get_log_shards()
+        # checkpoint of the parser run, known before counting the lines appended since the last run
+        self.__parser_id = dict_parser['id']
+        self.__checkpoints = checkpoints
+        try:
+            self.__log_checkpoint = checkpoints is not None and dict_log['checkpoint']['active'] == 'yes'
+        except (KeyError, TypeError):
+            self.__log_checkpoint = False
+        if self.__log_compression:
+            self.__log_checkpoint = False  # a compressed (rotated) log file does not grow
+        self.__parser_resume = None if run_state else self.get_resume_position()
+        if run_state:
+            self.__log_file_lines_number = run_state['linesNumber']
+        elif lines_number is None:
+            self.__log_file_lines_number = self.get_log_lines_number()
+        else:
+            self.__log_file_lines_number = lines_number  # already counted for another parser of the log
         self.__log_date_exists = dict_log['date']['exists']
         self.__log_date_format = dict_log['date']['format']
+        self.__log_date_parser = tstamp.ClsTimestampParser(self.__log_date_format)
         self.__log_date_regex = dict_log['date']['regex']
+        self.__log_date_ordered = dict_log['date'].get('ordered') == 'yes'
+        try:
+            self.__log_date_rx = rxregistry.REGISTRY.pattern(self.__log_date_regex)
+        except TypeError:
+            self.__log_date_rx = None  # no date regex
+        if self.__log_mmap and self.__log_date_rx:
+            self.__log_date_rx_bytes = rxregistry.REGISTRY.pattern(self.__log_date_regex.encode(self.__log_encoding))
+        else:
+            self.__log_date_rx_bytes = None
         # parser
         self.__dict_parser = dict_parser
-        self.__parser_id = dict_parser['id']
         self.__parser_text = dict_parser['text']
         # - chunk
         try:
@@ -228,6 +495,8 @@ class ClsParser:
             self.__parser_chunk_offset = 0
         self.__parser_chunk_index = self.__parser_chunk_offset
         self.__parser_chunk_count = self.__parser_chunk_number
+        self.__parser_chunk_stream = None
+        self.__parser_read_position = run_state['position'] if run_state else None
         self.__parser_mode_id = dict_parser['mode']['id']
         try:
             self.__parser_mode_keys_text = dict_parser['mode']['keys']['text']
@@ -241,6 +510,9 @@ class ClsParser:
         self.__parser_regex = dict_parser['regex']['text']
         self.__parser_key_level = dicttools.count_key_level(dict_parser, KEY_KEYS)
         self.__parser_search_col = self.search_list()
+        self.__parser_prefilter = prefilter.ClsKeyPrefilter(self.__parser_search_col, self.__parser_regex)
+        self.__parser_bytes_prefilter = self.get_bytes_prefilter()  # None - no literal search in the bytes
+        self.__parser_bytes_search = self.get_bytes_search()  # None - lines are decoded before the key search
         self.__parser_filter_time = dict_parser['selection']['time']['active'] == 'yes'
         self.__parser_filter_status = dict_parser['selection']['status']
         self.__parser_time_offset = self.get_parser_time_offset()
@@ -248,14 +520,25 @@ class ClsParser:
         self.__parser_const_status_ok = self.__dict_parser['result']['constants']['status']['ok']
         self.__parser_const_status_error = self.__dict_parser['result']['constants']['status']['error']
         self.__parser_const_status_warning = self.__dict_parser['result']['constants']['status']['warning']
-        self.__parser_dt_start = datetime.datetime.now() + datetime.timedelta(**self.__parser_time_offset)
-        self.__parser_dt_end = self.__parser_dt_start + datetime.timedelta(**self.__parser_time_interval)
-        if re.search(r'(-?\d*):(-?\d*):(\d*)', dict_parser['selection']['group']['slice']):
+        if run_state:
+            self.__parser_dt_start = run_state['dtStart']
+            self.__parser_dt_end = run_state['dtEnd']
+            self.__parser_time_seek = None
+        else:
+            self.__parser_dt_start = datetime.datetime.now() + datetime.timedelta(**self.__parser_time_offset)
+            self.__parser_dt_end = self.__parser_dt_start + datetime.timedelta(**self.__parser_time_interval)
+            self.__parser_time_seek = self.get_time_seek_position()
+        if RX_GROUP_SLICE.search(dict_parser['selection']['group']['slice']):
             self.__parser_group_slice = dict_parser['selection']['group']['slice']
         else:
             self.__parser_group_slice = '-1::'  # default - last element
         self.__parser_result_fields = dict_parser['result']['fields']
-        self.env_tuples = ClsEnvTuples()
+        self.__parser_render_plan = render.ClsRenderPlan(self.__parser_result_fields, RX_PLACEHOLDER)
+        self.env_tuples = ENV_TUPLES
+        self.__parser_time_factor = None  # see unix_time
+        self.__parser_placeholder_constants = self.placeholder_constants()
+        self.__parser_placeholder_providers = self.placeholder_providers()
+        self.__parser_placeholders = self.get_placeholders()
         if 'file' in dict_parser['out']:
             self.__parser_result_file_path = dict_parser['out']['file']['pathName'] + '/' + \
                                              dict_parser['out']['file']['fileName']
@@ -263,9 +546,16 @@ class ClsParser:
         if 'http' in dict_parser['out']:
             self.__parser_http_out_chunk_key = dict_parser['out']['http']['chunkKey']
             self.__parser_http_out_time_factor = dict_parser['out']['http']['timeFactor']
+            batch = dict_parser['out']['http'].get('batch') or {}
+            self.__parser_http_out_batch_active = batch.get('active') == 'yes'
+            self.__parser_http_out_batch_max_events = batch.get('maxEvents') or 0
+            self.__parser_http_out_batch_max_bytes = batch.get('maxBytes') or httpout.HTTP_BATCH_MAX_BYTES
+            self.__parser_http_out_batch_gzip = batch.get('gzip') == 'yes'
+            self.__parser_http_out_batch_rejected = set()  # targets, which do not accept batches
         if 'mail' in dict_parser['out']:
             self.__parser_mail_out_chunk_key = dict_parser['out']['mail']['chunkKey']
             self.__parser_mail_out_time_factor = dict_parser['out']['mail']['timeFactor']
+            self.__parser_mail_out_fold = dict_parser['out']['mail'].get('fold') == 'yes'
 
         # logger
         self.__logger = logger
@@ -298,6 +588,68 @@ class ClsParser:
         except AssertionError:
             return None
 
+    @property
+    def log_id(self):
+        return self.__log_id
+
+    @property
+    def parser_id(self):
+        return self.__parser_id
+
+    @property
+    def log_file_lines_number(self):
+        return self.__log_file_lines_number
+
+    @property
+    def line_break(self):
+        """
+        The line break of the lines read from the logfile, bytes if the logfile is memory mapped.
+        """
+        return b'\n' if self.__log_mmap else '\n'
+
+    @property
+    def log_checkpoint(self):
+        return self.__log_checkpoint
+
+    @property
+    def read_position(self):
+        return self.__parser_read_position
+
+    @read_position.setter
+    def read_position(self, position):
+        self.__parser_read_position = position
+
+    @property
+    def checkpoint_position(self):
+        """
+        The position up to which the logfile has been parsed, recorded by commit_checkpoint().
+        """
+        if self.__parser_read_position:
+            return self.__parser_read_position
+        if self.__parser_resume:
+            return {'line': self.__parser_resume['line'], 'offset': self.__parser_resume['offset']}
+        return {'line': 0, 'offset': 0}
+
+    @property
+    def run_state(self):
+        """
+        The state of the run of this parser, which parser objects created with it take over:
+        number of lines, time range and checkpoint position.
+        """
+        return {'linesNumber': self.__log_file_lines_number, 'dtStart': self.__parser_dt_start,
+                'dtEnd': self.__parser_dt_end, 'position': self.checkpoint_position}
+
+    @property
+    def time_stop_date(self):
+        """
+        Date after which reading the logfile can stop, as all following lines are out of the time range.
+        The date is only provided for time ordered logs without checkpoint, as the checkpoint
+        has to record the position behind the last line read.
+        """
+        if self.__parser_time_seek and not self.__log_checkpoint:
+            return self.__parser_dt_end
+        return None
+
     @property
     def log_file_path(self):
         try:
@@ -306,59 +658,551 @@ class ClsParser:
         except ValueError:
             return None
 
+    def get_log_mmap(self):
+        """
+        Check if the log file is memory mapped and filtered as bytes (read.mmap).
+        This requires an uncompressed log file, an ASCII compatible encoding (read.encoding)
+        and a date regex, which can be encoded.
+        :return: True if the log file is read as bytes
+        """
+        try:
+            if self.__dict_log['read']['mmap'] != 'yes':
+                return False
+        except (KeyError, TypeError):
+            return False
+        if self.__log_compression or not logreader.ascii_compatible(self.__log_encoding):
+            return False
+        try:
+            self.__dict_log['date']['regex'].encode(self.__log_encoding)
+        except (KeyError, TypeError, AttributeError):
+            pass  # no date regex
+        except UnicodeEncodeError:
+            return False
+        return True
+
+    def get_log_index(self):
+        """
+        Get the line index of the log file, if it is activated for the log.
+        A time ordered log (date.ordered) keeps the index in any case, as the time seek
+        numbers the lines in front of the time range from the nearest index entry.
+        The index file is placed into the directory index.pathName or, if no directory is given,
+        next to the log file for an activated index and into INDEX_PATH for a time ordered log,
+        as the directory of the log file may not be writable or matched by the log rotation.
+        :return: Up to date line index or None
+        """
+        d_index = self.__dict_log.get('index') or {}
+        if d_index.get('active') != 'yes':
+            try:
+                if self.__dict_log['date']['ordered'] != 'yes' or self.__log_compression:
+                    return None
+            except (KeyError, TypeError):
+                return None
+        step = d_index.get('step') or lineindex.LINE_INDEX_STEP
+        if d_index.get('pathName'):
+            index_path = d_index['pathName'] + '/' + self.__log_id + '_' + self.__log_filename
+        elif d_index.get('active') != 'yes':
+            try:
+                os.makedirs(INDEX_PATH, exist_ok=True)
+            except OSError:
+                return None
+            index_path = INDEX_PATH + '/' + self.__log_id + '_' + self.__log_filename
+        else:
+            index_path = self.__log_file_path
+        if self.__log_compression:
+            obj_index = logreader.ClsMemberIndex(self.__log_file_path, index_path + logreader.MEMBER_INDEX_EXT,
+                                                 self.__log_compression, step)
+        else:
+            obj_index = lineindex.ClsLineIndex(self.__log_file_path, index_path + lineindex.LINE_INDEX_EXT, step)
+        obj_index.update()
+        obj_index.save()
+        return obj_index
+
+    def get_log_shards(self):
+        """
+        Get the number of shards (byte ranges) the log file is parsed in by parallel worker processes.
+        Compressed log files are parsed in one process.
+        :return: Number of shards, 0 or 1 for parsing in one process
+        """
+        if self.__log_compression:
+            return 0
+        try:
+            return max(int(self.__dict_log['shards']['count']), 0)
+        except (KeyError, TypeError, ValueError):
+            return 0
+
     def get_log_lines_number(self):
         """
         Get the number of lines in log file.
+        The line index provides the number without reading the log file.
+        If parsing resumes from a checkpoint, only the lines appended since the last run are counted.
         :return: The number of lines in log file.
         """
-        line_counter = 0
-        with open(self.log_file_path, 'r') as fh:
-            for _ in fh:
+        if self.__log_index:
+            return self.__log_index.lines_number
+        line_counter, offset = 0, 0
+        if self.__parser_resume:
+            line_counter, offset = self.__parser_resume['line'], self.__parser_resume['offset']
+        with self.open_log(offset) as fh:
+            for _ in iter(fh.readline, self.line_break[:0]):
                 line_counter += 1
         return line_counter
 
-    def get_chunk(self, n=0):
+    def chunk_line_range(self, chunk_no):
         """
-        Get the next chunk from logfile or if given the n-th chunk.
+        Get the line range of the chunk with the given chunk number.
 
-        :param n: optional parameter for the n-th chunk to obtain
-        :return: Dictionary containing the next or n-th chunk of logfile
+        :param chunk_no: chunk number, negative numbers count from the end of file
+        :return: Tuple (first line, last line) of the chunk
+        """
+        if chunk_no >= 0:
+            chunk_line_start = (chunk_no * self.__parser_chunk_size) + 1
+        else:
+            chunk_line_start = self.__log_file_lines_number + (chunk_no * self.__parser_chunk_size) + 1
+        chunk_line_end = chunk_line_start + self.__parser_chunk_size - 1
+        return chunk_line_start, chunk_line_end
+
+    def chunk_windows(self):
+        """
+        Get the line ranges of all chunks selected by the chunk selection
+        (selection.chunk.size, number and offset) in reading order.
+        A chunk number of 0 selects all chunks from the offset to the end of file.
+        If parsing resumes from a checkpoint, all lines appended since the last run are selected.
+
+        :return: List of tuples (first line, last line), one for every chunk
+        """
+        if self.__parser_chunk_size <= 0:
+            return []
+        if self.__parser_resume:
+            # all lines appended since the last run
+            return self.time_windows([(line_start, line_start + self.__parser_chunk_size - 1)
+                                      for line_start in range(self.__parser_resume['line'] + 1,
+                                                              self.__log_file_lines_number + 1,
+                                                              self.__parser_chunk_size)])
+        chunk_count = self.__parser_chunk_number
+        if chunk_count == 0:
+            if self.__parser_chunk_offset < 0:
+                chunk_count = abs(self.__parser_chunk_offset)
+            else:
+                chunk_count = -(-self.__log_file_lines_number // self.__parser_chunk_size) - self.__parser_chunk_offset
+        windows = []
+        for chunk_no in range(self.__parser_chunk_offset, self.__parser_chunk_offset + chunk_count):
+            line_start, line_end = self.chunk_line_range(chunk_no)
+            if line_start > self.__log_file_lines_number:
+                break
+            windows.append((line_start, line_end))
+        return self.time_windows(windows)
+
+    def time_windows(self, windows):
+        """
+        Cut the lines in front of the time range off the chunk windows.
+        These lines are out of the time range, if the logfile is time ordered.
+
+        :param windows: List of tuples (first line, last line), one for every chunk
+        :return: List of tuples (first line, last line) of the chunks reaching into the time range
+        """
+        if not self.__parser_time_seek:
+            return windows
+        first_line = self.__parser_time_seek['line'] + 1
+        return [(max(line_start, first_line), line_end) for line_start, line_end in windows if line_end >= first_line]
+
+    def line_item(self, line_no, line):
+        """
+        Create the item representing one line of the logfile.
+
+        :param line_no: line number of logfile
+        :param line: line text
+        :return: Line record containing
                  - number: line number of logfile
                  - date: line date if existing
                  - text: line text
+        """
+        return ClsLine(line_no, self.get_datetime(line), line)
 
+    def open_at_line(self, line_no):
         """
-        chunk = []
-        line_counter = 0
+        Open the logfile for reading with the file position in front of a line as close as possible
+        without reading the file, based on the line index, the checkpoint and the time seek.
+        Compressed logfiles are decompressed while reading.
 
-        if n > 0:
-            chunk_no = n - 1
-        else:
-            chunk_no = self.__parser_chunk_index
-            self.__parser_chunk_index += 1
-            # check number of requested chunks has already been reached
-            if self.__parser_chunk_number == 0:
-                return None
-            else:
-                self.__parser_chunk_number -= 1
+        :param line_no: line number to move to
+        :return: Tuple (logfile opened for reading, number of the line in front of the file position)
+        """
+        line_counter, offset = self.seek_position(line_no)
+        return self.open_log(offset), line_counter
 
-        if chunk_no >= 0:
-            chunk_line_start = (chunk_no * self.__parser_chunk_size) + 1
+    def open_log(self, offset=0):
+        """
+        Open the logfile for reading at a byte offset.
+        With read.mmap the logfile is memory mapped and its lines are read as bytes,
+        which are decoded only if they pass the bytes check of the keys. Otherwise the lines
+        are read as text in the encoding of the log (read.encoding and read.errors).
+
+        :param offset: byte offset, for compressed logfiles the offset of a stream member
+        :return: logfile opened for reading lines by readline()
+        """
+        if self.__log_mmap:
+            return logreader.open_mapped(self.__log_file_path, offset)
+        return logreader.open_text(self.__log_file_path, offset, self.__log_compression, self.__log_encoding,
+                                   self.__log_errors)
+
+    @staticmethod
+    def read_offset(fh, incomplete):
+        """
+        Get the byte offset behind the last complete line read from the logfile.
+
+        :param fh: uncompressed logfile opened by open_log() or open_tail()
+        :param incomplete: incomplete last line, which has been read
+        :return: byte offset
+        """
+        if isinstance(incomplete, bytes):
+            return fh.tell() - len(incomplete)
+        if not incomplete:
+            return fh.tell()
+        # the incomplete line reaches to the end of the file, its start is searched in the bytes,
+        # as the decoded text may differ in length (read.errors 'replace' or 'ignore')
+        return logreader.line_start(fh.fileno(), fh.buffer.tell(), fh.encoding)
+
+    def decode_line(self, line):
+        """
+        Decode a line read as bytes in the encoding of the log.
+        A CR LF line break becomes LF like in a logfile read as text.
+
+        :param line: line of logfile as bytes
+        :return: line text
+        """
+        text = line.decode(self.__log_encoding, self.__log_errors)
+        if text.endswith('\r\n'):
+            text = text[:-2] + '\n'
+        return text
+
+    def seek_position(self, line_no):
+        """
+        Get the nearest known position in front of a line
+        from the line index, the checkpoint and the time seek.
+
+        :param line_no: line number
+        :return: Tuple (number of the line in front of the position, byte offset),
+                 for compressed logfiles the offset of a stream member
+        """
+        line_counter, offset = 0, 0
+        if self.__log_index:
+            index_line_no, offset = self.__log_index.seek(line_no)
+            line_counter = index_line_no - 1
+        if self.__parser_resume and line_counter < self.__parser_resume['line'] < line_no:
+            line_counter, offset = self.__parser_resume['line'], self.__parser_resume['offset']
+        if self.__parser_time_seek and line_counter < self.__parser_time_seek['line'] < line_no:
+            line_counter, offset = self.__parser_time_seek['line'], self.__parser_time_seek['offset']
+        return line_counter, offset
+
+    def iter_chunks(self, windows=None):
+        """
+        Iterate through the selected chunks of the logfile.
+        The logfile is read only once, chunk after chunk.
+        With an active checkpoint, an incomplete last line is left for the next run.
+        Reading a time ordered logfile stops at the first line after the time range.
+        A memory mapped logfile is searched for the literal keys instead, see iter_mapped_chunks().
+
+        :param windows: optional list of line ranges, default are the chunk windows of the parser
+        :return: Generator of lists, each containing the lines of one chunk as line records
+                 - number: line number of logfile
+                 - date: line date if existing
+                 - text: line text
+        """
+        if windows is None:
+            windows = self.chunk_windows()
+        if not windows:
+            return
+        time_stop = self.time_stop_date
+        line_break = self.line_break
+        fh, line_counter = self.open_at_line(windows[0][0])
+        with fh:
+            if self.__parser_bytes_prefilter and not time_stop and isinstance(fh, mmap.mmap):
+                yield from self.iter_mapped_chunks(fh, line_counter, windows)
+                return
+            # readline keeps the file position available for the checkpoint
+            lines = iter(fh.readline, line_break[:0])
+            incomplete = line_break[:0]
+            stopped = False
+            for chunk_line_start, chunk_line_end in windows:
+                # skip lines in front of the chunk without evaluating them
+                if chunk_line_start - 1 > line_counter:
+                    skip = chunk_line_start - 1 - line_counter
+                    line_counter += sum(1 for _ in itertools.islice(lines, skip))
+                chunk = []
+                for line in lines:
+                    if self.__log_checkpoint and not line.endswith(line_break):
+                        incomplete = line
+                        break
+                    line_counter += 1
+                    item = self.line_item(line_counter, line)
+                    if time_stop and item.date and item.date > time_stop:
+                        stopped = True
+                        break
+                    chunk.append(item)
+                    if line_counter >= chunk_line_end:
+                        break
+                if chunk:
+                    yield chunk
+                if incomplete or stopped or not chunk:
+                    break
+            if self.__log_checkpoint:
+                self.__parser_read_position = {'line': line_counter, 'offset': self.read_offset(fh, incomplete)}
+
+    def iter_mapped_chunks(self, mm, line_counter, windows):
+        """
+        Iterate through the selected chunks of a memory mapped logfile.
+        Instead of reading every line, the byte range of a chunk is searched for the literal keys
+        and only the lines containing a key are taken into the chunk. With the time filter,
+        the nearest dated line in front of an undated one is taken as well, as it decides,
+        whether the undated line is in the time range.
+        With an active checkpoint, an incomplete last line is left for the next run.
+
+        :param mm: memory mapped logfile, positioned in front of the line following line_counter
+        :param line_counter: number of the line in front of the position
+        :param windows: list of line ranges
+        :return: Generator of lists, each containing the lines of one chunk containing keys as line records
+        """
+        find = mm.find
+        pos = mm.tell()
+        if self.__log_checkpoint:
+            end = max(mm.rfind(b'\n') + 1, pos)
         else:
-            chunk_line_start = self.__log_file_lines_number + (chunk_no * self.__parser_chunk_size) + 1
-        chunk_line_end = chunk_line_start + self.__parser_chunk_size - 1
+            end = len(mm)
+        for chunk_line_start, chunk_line_end in windows:
+            # skip lines in front of the chunk
+            while line_counter < chunk_line_start - 1 and pos < end:
+                pos = find(b'\n', pos, end) + 1 or end
+                line_counter += 1
+            if pos >= end:
+                break
+            chunk_start, chunk_line_counter = pos, line_counter
+            while line_counter < chunk_line_end and pos < end:
+                pos = find(b'\n', pos, end) + 1 or end
+                line_counter += 1
+            chunk = self.mapped_chunk(mm, chunk_start, pos, chunk_line_counter)
+            if chunk:
+                yield chunk
+        if self.__log_checkpoint:
+            self.__parser_read_position = {'line': line_counter, 'offset': pos}
+
+    def mapped_chunk(self, mm, chunk_start, chunk_end, line_counter):
+        """
+        Get the lines containing keys within the byte range of a chunk of a memory mapped logfile.
+
+        :param mm: memory mapped logfile
+        :param chunk_start: offset of the first line of the chunk
+        :param chunk_end: offset behind the last line of the chunk
+        :param line_counter: number of the line in front of the chunk
+        :return: List of line records
+        """
+        chunk = []
+        filter_time = self.__parser_filter_time
+        pos = chunk_start  # search position
+        counted = chunk_start  # position up to which the lines are counted
+        taken = chunk_start  # position behind the last line taken
+        while True:
+            found = self.__parser_bytes_prefilter.find(mm, pos, chunk_end)
+            if found < 0:
+                break
+            line_start = mm.rfind(b'\n', chunk_start, found) + 1 or chunk_start
+            line_end = mm.find(b'\n', found, chunk_end) + 1 or chunk_end
+            line_counter += mm[counted:line_start].count(b'\n')
+            counted = line_start
+            item = self.line_item(line_counter + 1, mm[line_start:line_end])
+            if filter_time and not item.date:
+                dated_item = self.mapped_dated_item(mm, taken, line_start, line_counter)
+                if dated_item:
+                    chunk.append(dated_item)
+            chunk.append(item)
+            pos = taken = line_end
+        return chunk
 
-        with open(self.__log_file_path, 'r') as fh:
+    def mapped_dated_item(self, mm, range_start, line_start, line_counter):
+        """
+        Get the nearest dated line in front of a line of a memory mapped logfile.
+
+        :param mm: memory mapped logfile
+        :param range_start: offset, at which the search backwards stops
+        :param line_start: offset of the line
+        :param line_counter: number of the line in front of the line
+        :return: Line record or None, if there is no dated line behind range_start
+        """
+        line_end = line_start
+        while line_end > range_start:
+            line_start = mm.rfind(b'\n', range_start, line_end - 1) + 1 or range_start
+            line = mm[line_start:line_end]
+            dt = self.get_datetime(line)
+            if dt:
+                return ClsLine(line_counter, dt, line)
+            line_end = line_start
+            line_counter -= 1
+        return None
+
+    def iter_replay_chunks(self):
+        """
+        Iterate through the rest of the rotated logfile, which has not been parsed by the last run.
+        Line numbers continue the line numbers of the checkpoint.
+
+        :return: Generator of lists, each containing the lines of one chunk as line records
+        """
+        if not (self.__parser_resume and self.__parser_resume['replay']):
+            return
+        replay = self.__parser_resume['replay']
+        line_counter = replay['line']
+        chunk = []
+        with open(replay['path'], 'r', encoding=self.__log_encoding, errors=self.__log_errors) as fh:
+            fh.seek(replay['offset'])
             for line in fh:
                 line_counter += 1
-                item = {}
-                if line_counter in range(chunk_line_start, chunk_line_end + 1):
-                    item['number'] = line_counter
-                    item['date'] = self.get_datetime(line)
-                    item['text'] = line
-                    chunk.append(item)
+                chunk.append(self.line_item(line_counter, line))
+                if len(chunk) >= max(self.__parser_chunk_size, 1):
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def get_resume_position(self):
+        """
+        Get the position to resume parsing from, based on the checkpoint of the last run.
+        If the logfile was rotated or truncated, parsing starts at the beginning of the logfile.
+        With checkpoint.replayRotated the rest of the rotated logfile
+        (checkpoint.rotatedFileName) is parsed beforehand.
+
+        :return: Dictionary or None, if there is no checkpoint
+                 - line: number of the last parsed line
+                 - offset: byte offset behind the last parsed line
+                 - replay: rotated logfile to parse first (path, line, offset) or None
+        """
+        if not self.__log_checkpoint:
+            return None
+        entry = self.__checkpoints.get(self.__log_id, self.__parser_id)
+        if not entry:
+            return None
+        if checkpoint.is_continued(self.__log_file_path, entry):
+            return {'line': entry['line'], 'offset': entry['offset'], 'replay': None}
+        replay = None
+        d_checkpoint = self.__dict_log['checkpoint']
+        if d_checkpoint.get('replayRotated') == 'yes' and d_checkpoint.get('rotatedFileName'):
+            rotated_path = self.__log_pathname + '/' + d_checkpoint['rotatedFileName']
+            if checkpoint.is_predecessor(rotated_path, entry):
+                replay = {'path': rotated_path, 'line': entry['line'], 'offset': entry['offset']}
+        return {'line': 0, 'offset': 0, 'replay': replay}
+
+    def get_time_seek_position(self):
+        """
+        Get the position of the first line in the time range, if the logfile is time ordered
+        (date.ordered) and the parser filters for the time range.
+        The position is searched by bisection of the logfile. The line number is counted
+        from the nearest line index entry, which the time ordered log keeps, or the checkpoint
+        in front of the position.
+
+        :return: Dictionary or None, if no time seek is possible
+                 - line: number of the line in front of the position
+                 - offset: byte offset of the position
+        """
+        if not (self.__log_date_ordered and self.__parser_filter_time and self.has_dates()) or self.__log_compression:
+            return None
+        offset = timeseek.first_offset(self.__log_file_path, self.get_datetime, self.__parser_dt_start,
+                                       self.__log_encoding)
+        line_no, line_offset = 0, 0
+        if self.__log_index:
+            index_line_no, line_offset = self.__log_index.locate(offset)
+            line_no = index_line_no - 1
+        if self.__parser_resume and line_offset < self.__parser_resume['offset'] <= offset:
+            line_no, line_offset = self.__parser_resume['line'], self.__parser_resume['offset']
+        line_no += timeseek.count_lines(self.__log_file_path, line_offset, offset)
+        return {'line': line_no, 'offset': offset}
+
+    def commit_checkpoint(self):
+        """
+        Record the position up to which the logfile has been parsed
+        in the checkpoint store and save it.
 
-        return chunk
+        :return: True if a checkpoint has been recorded
+        """
+        if not self.__log_checkpoint:
+            return False
+        position = self.checkpoint_position
+        entry = checkpoint.file_fingerprint(self.__log_file_path)
+        entry['file'] = self.__log_file_path
+        entry['line'] = position['line']
+        entry['offset'] = position['offset']
+        self.__checkpoints.set(self.__log_id, self.__parser_id, entry)
+        if not self.__checkpoints.save():
+            self.__logger.warning('The checkpoint file ' + self.__checkpoints.file_path + ' cannot be written.')
+        return True
+
+    def follow_position(self):
+        """
+        Get the position, from which the logfile is followed for appended lines (--follow).
+        With a checkpoint, following continues behind the last line parsed by the last run,
+        otherwise the existing lines are skipped, starting from the nearest known position
+        in front of the end of the logfile.
+
+        :return: Tuple (number of the line in front of the position, byte offset,
+                 True if the lines behind the position are to be parsed)
+        """
+        if self.__parser_resume:
+            return self.__parser_resume['line'], self.__parser_resume['offset'], True
+        line_counter, offset = self.seek_position(self.__log_file_lines_number + 1)
+        return line_counter, offset, False
+
+    def open_tail(self, offset=0):
+        """
+        Open the logfile for following appended lines (--follow).
+        A memory map does not grow with the logfile, so a memory mapped log (read.mmap)
+        is followed as binary file, its lines are read as bytes as well.
+
+        :param offset: byte offset
+        :return: logfile opened for reading lines by readline()
+        :raises ValueError: The logfile is compressed.
+        """
+        if self.__log_compression:
+            raise ValueError('A compressed log file cannot be followed: ' + self.__log_file_path)
+        if self.__log_mmap:
+            fh = open(self.__log_file_path, 'rb')
+            fh.seek(offset)
+            return fh
+        return logreader.open_text(self.__log_file_path, offset, None, self.__log_encoding, self.__log_errors)
+
+    def follow_result(self, lines):
+        """
+        Parse lines appended to the logfile (--follow) like the lines of a new run.
+        The time range is moved to the current time, the positions of the last run
+        (checkpoint, time seek) do not apply any longer.
+
+        :param lines: List of line records
+        :return: Parser result, iterator of dictionaries
+        """
+        self.__parser_resume = None
+        self.__parser_time_seek = None
+        self.__parser_dt_start = datetime.datetime.now() + datetime.timedelta(**self.__parser_time_offset)
+        self.__parser_dt_end = self.__parser_dt_start + datetime.timedelta(**self.__parser_time_interval)
+        self.start_search()
+        if lines:
+            self.process_chunk(lines)
+        return self.finish_search()
+
+    def get_chunk(self, n=0):
+        """
+        Get the next chunk from logfile or if given the n-th chunk.
+
+        :param n: optional parameter for the n-th chunk to obtain
+        :return: List of line records of the next or n-th chunk of logfile
+                 - number: line number of logfile
+                 - date: line date if existing
+                 - text: line text
+
+        """
+        if n > 0:
+            for chunk in self.iter_chunks([self.chunk_line_range(n - 1)]):
+                return chunk
+            return []
+
+        # continue the chunk stream, which reads the logfile only once
+        if self.__parser_chunk_stream is None:
+            self.__parser_chunk_stream = self.iter_chunks()
+        return next(self.__parser_chunk_stream, None)
 
     def filter_chunk(self, chunk, filter_type):
         """
@@ -374,7 +1218,7 @@ class ClsParser:
         if filter_type == 'date':
             if self.log_date_exists:
                 for item in chunk:
-                    if item['date']:
+                    if item.date:
                         if self.in_time_range(item):
                             filtered_chunk.append(item)
                             take_item = True  # switch take_item ON to take subsequent items without date
@@ -385,7 +1229,7 @@ class ClsParser:
         else:
             if filter_type == 'keys':
                 for item in chunk:
-                    if self.in_search_list(item['text']):
+                    if self.in_search_list(item.text):
                         filtered_chunk.append(item)
         return filtered_chunk
 
@@ -400,14 +1244,18 @@ class ClsParser:
     def get_datetime(self, line):
         """
         Extracts the datetime from a line string based
-        on a regular expression search
-        :param line: String containing a datetime
+        on a regular expression search and the timestamp parser of the date format
+        :param line: String containing a datetime, or bytes if the logfile is memory mapped
         :return: datetime or None
         """
         try:
-            m = re.search(self.__log_date_regex, line)
-            dt_string = m.group(0)
-            dt = datetime.datetime.strptime(dt_string, self.__log_date_format)
+            if isinstance(line, bytes):
+                dt_string = self.__log_date_rx_bytes.search(line).group(0).decode(self.__log_encoding,
+                                                                                   self.__log_errors)
+            else:
+                m = self.__log_date_rx.search(line)
+                dt_string = m.group(0)
+            dt = self.__log_date_parser.parse(dt_string)
             assert isinstance(dt, datetime.datetime)
             return dt
         except TypeError:
@@ -451,14 +1299,13 @@ class ClsParser:
         Looks if item is within a time range defined by
         self.__parser_dt_start and self.__parser_dt_end
 
-        :param item: Item is a dictionary representing one line of logfile
-                     with some additional attributes.
+        :param item: Item is a line record representing one line of logfile.
         :return: true if extracted datetime is in time range,
                  otherwise false
         """
         if self.has_dates():
             try:
-                return self.__parser_dt_start <= item['date'] <= self.__parser_dt_end
+                return self.__parser_dt_start <= item.date <= self.__parser_dt_end
             except TypeError:
                 return False
         else:
@@ -489,6 +1336,7 @@ class ClsParser:
                      - in: list of search strings
                      - out: list of translated search strings
                      - regex: regular expression for search
+                     - rx: compiled regular expression
             """
             result_item = {}
 
@@ -499,6 +1347,8 @@ class ClsParser:
             result_item['in'] = in_lst
             result_item['out'] = out_lst
             result_item['regex'] = rx
+            # compiled regex of a key combination, shared by identical patterns, kept in the bounded cache
+            result_item['rx'] = rxregistry.REGISTRY.dynamic(rx)
 
             return result_item
 
@@ -544,41 +1394,111 @@ class ClsParser:
 
         return combi_list
 
+    def get_bytes_prefilter(self):
+        """
+        Build the key prefilter with encoded literals, if the logfile is memory mapped.
+        It rejects the lines, which contain none of the literal keys, without decoding them.
+
+        :return: Prefilter or None, if it cannot reject lines
+        """
+        if not self.__log_mmap:
+            return None
+        try:
+            bytes_prefilter = prefilter.ClsKeyPrefilter(self.__parser_search_col, self.__parser_regex,
+                                                        self.__log_encoding)
+        except UnicodeEncodeError:
+            return None  # keys not representable in the encoding
+        return bytes_prefilter if bytes_prefilter.rejecting else None
+
+    def get_bytes_search(self):
+        """
+        Build the check of lines read as bytes, if the logfile is memory mapped.
+        Lines containing none of the literal keys are rejected by the prefilter with encoded literals.
+        Without such a prefilter, the search regexes are encoded and searched as bytes patterns,
+        whose character classes (word, digit or space characters) match ASCII characters only.
+
+        :return: Function checking, if a line read as bytes may match the search list,
+                 or None, if the lines are decoded before the key search
+        """
+        if not self.__log_mmap:
+            return None
+        if self.__parser_bytes_prefilter:
+            return self.__parser_bytes_prefilter.may_match
+        try:
+            rx_list = [rxregistry.REGISTRY.dynamic(item['regex'].encode(self.__log_encoding))
+                       for item in self.__parser_search_col]
+        except UnicodeEncodeError:
+            return None  # keys not representable in the encoding
+        return lambda line: any(rx.search(line) for rx in rx_list)
+
     def in_search_list(self, line):
         """
         Check if line meets parser regex list.
+        Only the search items passing the literal key prefilter are searched by regex.
         :param line: line of logfile
         :return: Return True if line meets parser regex list.
         """
         in_list = False
-        for item in self.__parser_search_col:
-            if re.search(item['regex'], line):
+        for item in self.__parser_prefilter.candidates(line):
+            if item['rx'].search(line):
                 in_list = True
                 break
         return in_list
 
-    def combi_list(self, chunk):
+    def search_matches(self, line):
+        """
+        Get all search items matching a line.
+        Only the search items passing the literal key prefilter are searched by regex.
+        :param line: line of logfile
+        :return: List of indexes into the search list
+        """
+        search_col = self.__parser_search_col
+        return [i for i in self.__parser_prefilter.candidate_indexes(line) if search_col[i]['rx'].search(line)]
+
+    def item_matches(self, item):
+        """
+        Get all search items matching a line item.
+        A line read as bytes is decoded only if it is not rejected by the bytes check,
+        the text of the line item is replaced by the decoded line.
+
+        :param item: line record
+        :return: List of indexes into the search list
+        """
+        line = item.text
+        if isinstance(line, bytes):
+            if self.__parser_bytes_search and not self.__parser_bytes_search(line):
+                return []
+            line = item.text = self.decode_line(line)
+        return self.search_matches(line)
+
+    def bucket_chunk(self, chunk):
+        """
+        Filter a chunk of lines for the keys and put every found line
+        into the found buckets of the search items matching it.
+
+        :param chunk: chunk of lines from logfile
+        :return: List containing the found lines
+        """
+        filtered_chunk = []
+        for item in chunk:
+            matches = self.item_matches(item)
+            if matches:
+                filtered_chunk.append(item)
+                for i in matches:
+                    self.__parser_found_buckets[i].add(item)
+        return filtered_chunk
+
+    def combi_list(self):
         """
         This function extends search list items with the found items.
-        :param chunk: List of filtered items, each of which containing
-                      - number: line number
-                      - date: date of line
-                      - text: text of line
+        The found items are sliced by the group slice (selection.group.slice),
+        e.g. -1:None:None for only the last item.
         :return: List containing the search items together with the found items.
         """
         combi_list = []
-        for search_item in self.__parser_search_col:
-            found_list = []
-            for found_item in chunk:
-                if re.search(search_item['regex'], found_item['text']):
-                    found_list.append(found_item)
-            # post process found_list
-            #  slice the list in order to get only defined items
-            #  -1:None:None for only the last item
-            found_list = self.sliced_list(found_list, self.__parser_group_slice)
-
+        for search_item, bucket in zip(self.__parser_search_col, self.__parser_found_buckets):
             # add found_list to search_item
-            search_item['found'] = found_list
+            search_item['found'] = bucket.list
             combi_list.append(search_item)
 
         return combi_list
@@ -596,14 +1516,12 @@ class ClsParser:
                       - regex: regular expression for search
                       - in: keys for search
                       - out: keys for output
-                      - found: list of dicts
+                      - found: list of line records
                           - number: line number
                           - date: date of line
                           - text: text of line
-        :return: List containing the normalized combi list.
-                      - regex: regular expression for search
-                      - in: list of keys for search
-                      - out: list of keys for output
+        :return: List containing the normalized combi list as event records.
+                      - search: search item (regex, in, out)
                       - number: line number
                       - date: date of line
                       - status: event status (ok, error)
@@ -619,16 +1537,8 @@ class ClsParser:
                     if self.__parser_mode_id == 1:
                         # single mode
                         for fitem in citem['found']:
-                            cin = {}  # combi item normalized
-                            for k in citem.keys():
-                                if k == 'found':
-                                    cin['number'] = fitem['number']
-                                    cin['date'] = fitem['date']
-                                    cin['status'] = self.__parser_const_status_ok
-                                    cin['text'] = fitem['text']
-                                    cin['message'] = fitem['text']
-                                else:
-                                    cin[k] = citem[k]
+                            cin = ClsEvent(citem, fitem.number, fitem.date, self.__parser_const_status_ok,
+                                           fitem.text, fitem.text)  # combi item normalized
                             combi_list_normalized.append(cin)
                     else:
                         if self.__parser_mode_id == 2:
@@ -641,16 +1551,8 @@ class ClsParser:
                                 combi_list_normalized.append(cin)
                 else:
                     # positive events not found
-                    cin = {}  # combi item normalized
-                    for k in citem.keys():
-                        if k == 'found':
-                            cin['number'] = None
-                            cin['date'] = datetime.datetime.now()
-                            cin['status'] = self.__parser_const_status_error
-                            cin['text'] = None
-                            cin['message'] = 'Not found: ' + citem['regex']
-                        else:
-                            cin[k] = citem[k]
+                    cin = ClsEvent(citem, None, datetime.datetime.now(), self.__parser_const_status_error,
+                                   None, 'Not found: ' + citem['regex'])  # combi item normalized
                     combi_list_normalized.append(cin)
             else:
                 # regex search looks for negative events
@@ -659,29 +1561,13 @@ class ClsParser:
                     if self.__parser_mode_id == 1:
                         # single mode
                         for fitem in citem['found']:
-                            cin = {}  # combi item normalized
-                            for k in citem.keys():
-                                if k == 'found':
-                                    cin['number'] = fitem['number']
-                                    cin['date'] = fitem['date']
-                                    cin['status'] = self.__parser_const_status_error
-                                    cin['text'] = fitem['text']
-                                    cin['message'] = fitem['text']
-                                else:
-                                    cin[k] = citem[k]
+                            cin = ClsEvent(citem, fitem.number, fitem.date, self.__parser_const_status_error,
+                                           fitem.text, fitem.text)  # combi item normalized
                             combi_list_normalized.append(cin)
                 else:
                     # negative events not found
-                    cin = {}  # combi item normalized
-                    for k in citem.keys():
-                        if k == 'found':
-                            cin['number'] = None
-                            cin['date'] = datetime.datetime.now()
-                            cin['status'] = self.__parser_const_status_ok
-                            cin['text'] = None
-                            cin['message'] = 'Not found: ' + citem['regex']
-                        else:
-                            cin[k] = citem[k]
+                    cin = ClsEvent(citem, None, datetime.datetime.now(), self.__parser_const_status_ok,
+                                   None, 'Not found: ' + citem['regex'])  # combi item normalized
                     combi_list_normalized.append(cin)
 
         return combi_list_normalized
@@ -703,6 +1589,7 @@ class ClsParser:
         :return: One normalized combi list item or None, if the multiple step event is incomplete
                  and lies within the allowed maximum time interval
         """
+        evt_rx = [rxregistry.REGISTRY.pattern(eitem) for eitem in evtlist]
 
         def step_counts_equal(scounter) -> bool:
             """
@@ -732,11 +1619,11 @@ class ClsParser:
             """
             # check if there is an item 'date' in the found item list
             # if not, return steps_in_order=True
-            if not citm['found'][0]['date']:
+            if not citm['found'][0].date:
                 return True
 
             # get a found item list sorted by data ascending
-            c_item_found_sorted = sorted(citm['found'], key=itemgetter('date'))
+            c_item_found_sorted = sorted(citm['found'], key=attrgetter('date'))
 
             # slice last n items of found items
             # n is number of event steps
@@ -748,12 +1635,12 @@ class ClsParser:
             i = 0
             for f in c_item_found_sliced:
                 if str_last_item_date:
-                    if not f['date'] == str_last_item_date:
-                        rs = re.search(citem['regex'], f['text'])
-                        if not re.search(elist[i], rs.group(rgrp)):
+                    if not f.date == str_last_item_date:
+                        rs = citem['rx'].search(f.text)
+                        if not evt_rx[i].search(rs.group(rgrp)):
                             return False
                 else:
-                    str_last_item_date = f['date']
+                    str_last_item_date = f.date
                 i += 1
             return True
         
@@ -768,16 +1655,16 @@ class ClsParser:
             """
             # check if there is an item 'date' in the found item list
             # if not, return steps_in_order=True
-            if not citm['found'][0]['date']:
+            if not citm['found'][0].date:
                 return True
 
             # get a found item list sorted by data ascending
-            c_item_found_sorted = sorted(citm['found'], key=itemgetter('date'))
+            c_item_found_sorted = sorted(citm['found'], key=attrgetter('date'))
 
             str_last_item_date = None
             assert isinstance(c_item_found_sorted, list)
             for f in c_item_found_sorted:
-                str_last_item_date = f['date']
+                str_last_item_date = f.date
 
             # check date against now
             # if latest item date is not older than the step interval, then return true
@@ -789,17 +1676,14 @@ class ClsParser:
 
         # count steps for every step type of the multi step event (e.g. START, END)
         step_counter = []  # list of event count tuples (event_key, count)
-        for eitem in evtlist:
+        for eitem, eitem_rx in zip(evtlist, evt_rx):
             count = 0
             for fitem in citem['found']:
-                m = re.search(citem['regex'], fitem['text'])
-                if re.search(eitem, m.group(rgroup)):
+                m = citem['rx'].search(fitem.text)
+                if eitem_rx.search(m.group(rgroup)):
                     count += 1
             step_counter.append((eitem, count))
 
-        # build normalized combi item
-        cin = {}  # combi item normalized
-
         error_step_order = ''
         if step_counts_equal(step_counter):
             if steps_in_order(citem, evtlist, rgroup):
@@ -822,19 +1706,11 @@ class ClsParser:
             else:
                 status = self.__parser_const_status_error
 
-        for k in citem.keys():
-            if k == 'found':
-                m = re.search(citem['regex'], citem[k][-1]['text'])
-                cin['number'] = citem[k][-1]['number']
-                if citem[k][-1]['date']:
-                    cin['date'] = citem[k][-1]['date']
-                else:
-                    cin['date'] = datetime.datetime.now()
-                cin['status'] = status
-                cin['text'] = m.group(0)
-                cin['message'] = m.group(0) + ' (step counter: ' + format(step_counter) + ', ' + error_step_order + ')'
-            else:
-                cin[k] = citem[k]
+        # build normalized combi item
+        fitem = citem['found'][-1]
+        m = citem['rx'].search(fitem.text)
+        cin = ClsEvent(citem, fitem.number, fitem.date or datetime.datetime.now(), status, m.group(0),
+                       m.group(0) + ' (step counter: ' + format(step_counter) + ', ' + error_step_order + ')')
 
         return cin
 
@@ -847,7 +1723,19 @@ class ClsParser:
         :return: Sliced list
         """
         o_list = org_list
-        m = re.search(r'(-?\d*):(-?\d*):(\d*)', slice_str)
+        x, y, z = ClsParser.slice_bounds(slice_str)
+
+        sliced_list = o_list[x:y:z]
+        return sliced_list
+
+    @staticmethod
+    def slice_bounds(slice_str):
+        """ Get the bounds of a slice string like '-1::'.
+
+        :param slice_str: String telling how to slice
+        :return: Tuple (start, stop, step), missing values are None
+        """
+        m = RX_GROUP_SLICE.search(slice_str)
         x, y, z = m.groups(None)
 
         try:
@@ -862,9 +1750,105 @@ class ClsParser:
             z = int(z)
         except ValueError:
             z = None
+        return x, y, z
 
-        sliced_list = o_list[x:y:z]
-        return sliced_list
+    def placeholder_constants(self):
+        """
+        This function gets the values of the placeholders, which are the same for all events of the run.
+        They are computed once per parser.
+        :return: Dictionary of placeholder names and values
+        """
+        constants = {PH_ENVIRONMENT: self.__log_environment, PH_BUSINESS_AREA: self.__log_business_area,
+                     PH_PARSER_ID: self.__parser_id, PH_SOURCEFILE: self.__log_file_path,
+                     PH_CONFIGFILE: CONFIG_FILE}
+        # environment details
+        constants.update(self.env_tuples.list)
+        return constants
+
+    def placeholder_providers(self):
+        """
+        This function registers the providers of the placeholder values, which differ from event to event.
+        A provider is called with the event and a dictionary for intermediate results of the event.
+        Key (%k1%) and regex group (%g1%) placeholders are registered by get_placeholders.
+        :return: Dictionary of placeholder names and providers
+        """
+        return {PH_PARSER_REGEX: lambda citem, memo: citem.regex,
+                PH_SOURCE_LINE_NUM: lambda citem, memo: str(citem.number),
+                PH_EVENT_STATUS: lambda citem, memo: citem.status,
+                PH_DATE_NOW: lambda citem, memo: self.unix_time(datetime.datetime.now()),
+                PH_EVENT_DATE: lambda citem, memo: self.unix_time(self.event_date(citem)),
+                PH_EVENT_MESSAGE: lambda citem, memo: str(citem.message)}
+
+    def get_placeholders(self):
+        """
+        This function gets the placeholders of the result template, which have a value, in the order
+        of their precedence: the order of the former result tuples, see ClsRenderPlan.render_text.
+        Providers of the key and regex group placeholders used are registered.
+        :return: List of tuples (placeholder, name of the value, case conversion or None)
+        """
+        names = [PH_ENVIRONMENT, PH_BUSINESS_AREA, PH_PARSER_ID, PH_PARSER_REGEX, PH_SOURCEFILE, PH_SOURCE_LINE_NUM,
+                 PH_CONFIGFILE, PH_EVENT_STATUS, PH_DATE_NOW, PH_EVENT_DATE, PH_EVENT_MESSAGE]
+        names += [k for k, v in self.env_tuples.list]
+        order = {name: i for i, name in enumerate(names)}
+        case_order = {None: 0, 'lower': 1, 'upper': 2}
+        placeholders = []
+        for placeholder in self.__parser_render_plan.placeholders:
+            m = RX_PLACEHOLDER_PARTS.fullmatch(placeholder)
+            name = VAR_DELIMITER + m.group(1) + VAR_DELIMITER
+            case = m.group(3)
+            if name in order:
+                rank = (0, order[name])
+            elif m.group(2) and int(m.group(2)[1:]) > 0:
+                n = int(m.group(2)[1:])
+                if name[1] == 'k':
+                    self.__parser_placeholder_providers[name] = functools.partial(self.key_value, n=n)
+                    rank = (1, n)
+                else:
+                    self.__parser_placeholder_providers[name] = functools.partial(self.group_value, n=n)
+                    rank = (2, n)
+            else:
+                continue  # no value, the placeholder is kept
+            placeholders.append((rank, case_order[case], placeholder, name, case))
+        placeholders.sort(key=itemgetter(0, 1))
+        return [(placeholder, name, case) for _, _, placeholder, name, case in placeholders]
+
+    @staticmethod
+    def event_date(citem):
+        if citem.date is None:
+            return datetime.datetime.now()
+        return citem.date
+
+    def unix_time(self, dt):
+        """
+        This function converts a date into unix time multiplied by the time factor of the http output.
+        :param dt: datetime
+        :return: Integer time
+        """
+        if self.__parser_time_factor is None:
+            try:
+                self.__parser_time_factor = int(self.http_out_time_factor)
+            except AttributeError:
+                self.__parser_time_factor = 1
+        return int(time.mktime(dt.timetuple()) * self.__parser_time_factor)
+
+    @staticmethod
+    def key_value(citem, memo, n):
+        """ Value of the key placeholder %kn%, the n-th out key of the search item. """
+        if n <= len(citem.out):
+            return citem.out[n - 1]
+        return render.MISSING
+
+    @staticmethod
+    def group_value(citem, memo, n):
+        """ Value of the regex group placeholder %gn%, the regex is matched once per event. """
+        if 'groups' not in memo:
+            if citem.text:
+                memo['groups'] = citem.rx.search(citem.text).groups()
+            else:
+                memo['groups'] = 9 * ('None',)
+        if n <= len(memo['groups']):
+            return memo['groups'][n - 1]
+        return render.MISSING
 
     def result_tuples(self, citem):
         """ This function builds result tuples.
@@ -876,94 +1860,195 @@ class ClsParser:
          elements like another dictionary. The result tuple is a flat result set
          for collecting the results and serves as a kind of intermediate result.
 
+         Only the placeholders used by the result template are evaluated.
+
          Example:
         ('%k1%', 'AZSE') - key is the placeholder '%k1%', value is 'AZSE'
 
         :param citem: Normalized combi item containing search and found items
         :return: tuples list containing the results
         """
-        # time
-        #  date
-        date_now = datetime.datetime.now()
-        if citem['date'] is None:
-            event_date = datetime.datetime.now()
-        else:
-            event_date = citem['date']
-        #  time factor
-        try:
-            time_factor = int(self.http_out_time_factor)
-        except AttributeError:
-            time_factor = 1
-
-        # tuple list
-        tuple_list_all = []
-        tuple_list = [(PH_ENVIRONMENT, self.__log_environment), (PH_BUSINESS_AREA, self.__log_business_area),
-                      (PH_PARSER_ID, self.__parser_id), (PH_PARSER_REGEX, citem['regex']),
-                      (PH_SOURCEFILE, self.__log_file_path), (PH_SOURCE_LINE_NUM, str(citem['number'])),
-                      (PH_CONFIGFILE, CONFIG_FILE), (PH_EVENT_STATUS, citem['status']),
-                      (PH_DATE_NOW, int(time.mktime(date_now.timetuple()) * time_factor)),
-                      (PH_EVENT_DATE, int(time.mktime(event_date.timetuple()) * time_factor)),
-                      (PH_EVENT_MESSAGE, str(citem['message']))]
-        # environment details
-        for k, v in self.env_tuples.list:
-            tuple_list.append((k, v))
-        # out keys %k..%
-        for i, o in enumerate(citem['out'], start=1):
-            tuple_list.append(('%k' + str(i) + '%', o))
-            # tuple_list.append(('%k' + str(i) + '.lower%', str(o).lower()))
-        # regex groups %g..%
-        if citem['text']:
-            m = re.search(citem['regex'], citem['text'])
-            for i, r in enumerate(m.groups(), start=1):
-                if i > 0:
-                    tuple_list.append(('%g' + str(i) + '%', r))
-        else:
-            for i in range(1, 10):
-                tuple_list.append(('%g' + str(i) + '%', 'None'))
+        tuple_list = []
+        values = {}
+        memo = {}  # intermediate results of the event
+        for placeholder, name, case in self.__parser_placeholders:
+            if name in self.__parser_placeholder_constants:
+                v = self.__parser_placeholder_constants[name]
+            else:
+                if name not in values:
+                    values[name] = self.__parser_placeholder_providers[name](citem, memo)
+                v = values[name]
+            if v is render.MISSING:
+                continue
+            # lower and upper case variants of strings, other values are kept unchanged
+            if case == 'lower' and isinstance(v, str):
+                v = v.lower()
+            elif case == 'upper' and isinstance(v, str):
+                v = v.upper()
+            tuple_list.append((placeholder, v))
+        return tuple_list
+
+    def fill_placeholders(self, tuple_list):
+        """
+        Create the result dictionary of an event from the result template (result.fields)
+        by replacing the placeholders with values from tuple_list.
+        The template is compiled once per parser into a render plan.
+        :param tuple_list: Tuple list containing tuples of keys with names that equal the placeholder
+                          names in the template and values that shall replace the placeholders.
+        :return: Dictionary with values instead of placeholders
+        """
+        return self.__parser_render_plan.render(dict(tuple_list))
 
-        for k, v in tuple_list:
-            tuple_list_all.append((k, v))  # original tuple
-            # lower and upper case tuples
-            if isinstance(v, str):
-                tuple_list_all.append((VAR_DELIMITER + k.strip(VAR_DELIMITER) + '.lower' + VAR_DELIMITER, v.lower()))
-                tuple_list_all.append((VAR_DELIMITER + k.strip(VAR_DELIMITER) + '.upper' + VAR_DELIMITER, v.upper()))
-            else:  # keep it unchanged
-                tuple_list_all.append((VAR_DELIMITER + k.strip(VAR_DELIMITER) + '.lower' + VAR_DELIMITER, v))
-                tuple_list_all.append((VAR_DELIMITER + k.strip(VAR_DELIMITER) + '.upper' + VAR_DELIMITER, v))
+    def run_search(self):
+        """
+        This function searches the log file and gets the parser result.
+        The events are rendered while the result is iterated.
 
-        return tuple_list_all
+        :return: Parser result, iterator of dictionaries
+        """
+        self.start_search()
+        if self.__log_shards > 1 and not self.__log_checkpoint and self.process_shards():
+            return self.finish_search()
+        # Get file content chunk wise to save memory, the file is read only once.
+        # A chunk contains a number of lines defined in config file via chunksize.
+        for chunk_lines in itertools.chain(self.iter_replay_chunks(), self.iter_chunks()):
+            self.process_chunk(chunk_lines)
+        return self.finish_search()
+
+    def process_shards(self):
+        """
+        This function parses the selected chunks of the log file in shards (byte ranges
+        aligned to lines) by parallel worker processes and merges the found lines of the shards.
+        The lines of every shard are counted first, so that the line numbers are global line numbers.
+
+        Undated lines at the beginning of a shard belong to the last dated line in front of it.
+        They are taken, if the previous shard ends with a line in the time range within the same chunk.
+
+        :return: True if the log file has been parsed in shards,
+                 False if it is too small to be split
+        """
+        windows = self.chunk_windows()
+        if not windows:
+            return True
+        line_counter, start = self.seek_position(windows[0][0])
+        end = os.path.getsize(self.__log_file_path)
+        offsets = shards.boundaries(self.__log_file_path, start, end, self.__log_shards)
+        if len(offsets) < 3:
+            return False
+        self.__logger.info('Parse the log file in ' + str(len(offsets) - 1) + ' shards.')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(offsets) - 1) as pool:
+            # count the lines of the shards, the last shard is read up to the end of file
+            counts = list(pool.map(timeseek.count_lines, itertools.repeat(self.__log_file_path),
+                                   offsets[:-2], offsets[1:-1]))
+            futures = []
+            for shard_start, shard_lines in zip(offsets, counts + [None]):
+                futures.append(pool.submit(ClsParser.parse_shard, self.__dict_log, self.__dict_parser,
+                                           self.run_state, shard_start, shard_lines, line_counter, windows,
+                                           self.env_tuples.list))
+                line_counter += shard_lines or 0
+            take_item = False
+            for future in futures:
+                lines_found, found_items, head, take_item_end = future.result()
+                if take_item:
+                    # undated lines continuing the last dated line of the previous shard
+                    for item, matches in head:
+                        self.__lines_found += 1
+                        for i in matches:
+                            self.__parser_found_buckets[i].add(item)
+                self.__lines_found += lines_found
+                for bucket, items in zip(self.__parser_found_buckets, found_items):
+                    for item in items:
+                        bucket.add(item)
+                if take_item_end is not None:
+                    take_item = take_item_end
+        return True
 
     @staticmethod
-    def fill_placeholders(obj_dict, tuple_list):
+    def parse_shard(dict_log, dict_parser, run_state, shard_start, shard_lines, line_counter, windows, env_list):
         """
-        Copy the dictionary obj_dict and replace placeholders with
-        values from tuple_list
-        :param obj_dict: Dictionary which serves as a pattern for the dictionary to return.
-        :param tuple_list: Tuple list containing tuples of keys with names that equal the placeholder
-                          names in obj_dict and values that shall replace the placeholders.
-        :return: Dictionary with values instead of placeholders
+        This function parses one shard of the log file in a worker process.
+        The shard parser takes over the run state of the parser splitting the log file,
+        so all shards filter for the same time range and none of them indexes or seeks the log file.
+
+        :param dict_log: Log configuration
+        :param dict_parser: Parser configuration
+        :param run_state: Run state of the parser splitting the log file
+        :param shard_start: Byte offset of the shard
+        :param shard_lines: Number of lines of the shard, None - up to the end of file
+        :param line_counter: Number of the line in front of the shard
+        :param windows: Chunk windows of the parser
+        :param env_list: Environment tuples resolved by the main process
+        :return: Result of the shard as provided by shard_result()
         """
-        resdict = copy.deepcopy(obj_dict)
-        for key_map in dicttools.key_sequences(resdict):
-            for k, v in tuple_list:
-                dict_value_old = str(dicttools.get_from_dict(resdict, key_map))
-                if re.search(k, dict_value_old):
-                    try:
-                        dict_value_new = dict_value_old.replace(k, v)
-                    except TypeError:
-                        dict_value_new = v  # number
-                    dicttools.set_from_dict(resdict, key_map, dict_value_new)
-        return resdict
+        ENV_TUPLES.assign(env_list)
+        logger = logging.Logger('parser', logging.WARNING)
+        obj_parser = ClsParser(dict_log, dict_parser, logger, run_state=run_state)
+        return obj_parser.shard_result(shard_start, shard_lines, line_counter, windows)
 
-    @property
-    def result_list(self):
+    def shard_result(self, shard_start, shard_lines, line_counter, windows):
         """
-        This function gets the parser result as a list of dictionaries.
-
-        :return: Parser result list of dictionaries
+        This function filters the lines of one shard for date and keys like process_chunk.
+        Whether undated lines at the beginning of the shard are in the time range,
+        depends on the previous shard. These lines are returned separately.
+
+        :param shard_start: Byte offset of the shard
+        :param shard_lines: Number of lines of the shard, None - up to the end of file
+        :param line_counter: Number of the line in front of the shard
+        :param windows: Chunk windows of the parser
+        :return: Tuple containing
+                 - number of found lines
+                 - list of the found lines of every search item
+                 - list of tuples (line, search item indexes) of the found undated lines at the beginning
+                 - take_item at the end of the shard, None if there is no dated line or chunk start
         """
-        chunks_accumulated = []
-        result_list = []
+        bounds = self.slice_bounds(self.__parser_group_slice)
+        buckets = [ClsFoundBucket(bounds) for _ in self.__parser_search_col]
+        lines_found = 0
+        head = []
+        take_item = None  # unknown for undated lines at the beginning of the shard
+        filter_time = self.__parser_filter_time
+        if filter_time and not self.has_dates():
+            return lines_found, [[] for _ in buckets], head, take_item
+        w = 0
+        with self.open_log(shard_start) as fh:
+            for line in itertools.islice(iter(fh.readline, self.line_break[:0]), shard_lines):
+                line_counter += 1
+                while w < len(windows) and windows[w][1] < line_counter:
+                    w += 1
+                if w == len(windows):
+                    break
+                if line_counter < windows[w][0]:
+                    continue
+                if line_counter == windows[w][0]:
+                    take_item = False  # a new chunk starts
+                item = self.line_item(line_counter, line)
+                if filter_time:
+                    if item.date:
+                        take_item = self.in_time_range(item)
+                        if not take_item:
+                            continue
+                    elif take_item is None:
+                        matches = self.item_matches(item)
+                        if matches:
+                            head.append((item, matches))
+                        continue
+                    elif not take_item:
+                        continue
+                matches = self.item_matches(item)
+                if matches:
+                    lines_found += 1
+                    for i in matches:
+                        buckets[i].add(item)
+        return lines_found, [bucket.items for bucket in buckets], head, take_item
+
+    def start_search(self):
+        """
+        This function prepares the search of the log file, which is performed chunk by chunk.
+        """
+        self.__lines_found = 0
+        self.__chunks_processed = 0
+        bounds = self.slice_bounds(self.__parser_group_slice)
+        self.__parser_found_buckets = [ClsFoundBucket(bounds) for _ in self.__parser_search_col]
         search_list = self.search_list()
         intend = LOG_INTEND * ' '
         print('parser: {}'.format(self.__parser_id))
@@ -975,51 +2060,73 @@ class ClsParser:
             self.__logger.debug(intend + s_item['regex'])
         self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
         self.__logger.debug('Processing chunks of the log file.')
-        i = 0
-        while True:
-            # Get file content chunk wise to save memory
-            # A chunk contains a number of lines defined in config file via chunksize.
-            chunk = ClsChunk(self.get_chunk())
-            if not chunk.list:
-                break
-            i += 1
-            self.__logger.debug('{} {:>2}:'.format('Chunk', i))
-            self.__logger.debug('{:>12} {}'.format('original:', chunk.log_info))
-            print('chunk start: {}, end: {}, size: {}'.format(chunk.line_start, chunk.line_end, chunk.length))
-            # filter date
-            if self.__parser_filter_time:
-                self.__logger.debug('Filtering dates ..')
-                chunk_filtered_date = ClsChunk(self.filter_chunk(chunk.list, 'date'))
-                if not chunk_filtered_date.list:
-                    self.__logger.debug('{:>12} {}'.format('filtered:', str(None)))
-                    continue
-                self.__logger.debug('{:>12} {}'.format('filtered:', chunk_filtered_date.log_info))
-            else:
-                chunk_filtered_date = ClsChunk(chunk.list)
-            # filter keys
-            self.__logger.debug('Filtering keys ..')
-            chunk_filtered_keys = ClsChunk(self.filter_chunk(chunk_filtered_date.list, 'keys'))
-            if not chunk_filtered_keys.list:
+        if self.__log_mmap:
+            self.__logger.info('Read the log file memory mapped, lines containing keys are decoded as ' +
+                               self.__log_encoding + '.')
+            if self.__parser_bytes_search is None:
+                self.__logger.debug('The keys cannot be encoded as ' + self.__log_encoding + ', lines are decoded '
+                                    'before the key search.')
+        if self.__parser_time_seek:
+            self.__logger.info('Time range starts after line ' + str(self.__parser_time_seek['line']) +
+                               ' of the log file.')
+        if self.__parser_resume:
+            self.__logger.info('Resume after line ' + str(self.__parser_resume['line']) + ' of the log file.')
+            if self.__parser_resume['replay']:
+                self.__logger.info('Parse the rest of the rotated log file ' + self.__parser_resume['replay']['path'] +
+                                   ' first.')
+
+    def process_chunk(self, chunk_lines):
+        """
+        This function filters one chunk of the log file for date and keys
+        and collects the found lines in the found buckets of the search items.
+
+        :param chunk_lines: List of line items of the chunk
+        """
+        chunk = ClsChunk(chunk_lines)
+        self.__chunks_processed += 1
+        self.__logger.debug('{} {:>2}:'.format('Chunk', self.__chunks_processed))
+        self.__logger.debug('{:>12} {}'.format('original:', chunk.log_info))
+        print('chunk start: {}, end: {}, size: {}'.format(chunk.line_start, chunk.line_end, chunk.length))
+        # filter date
+        if self.__parser_filter_time:
+            self.__logger.debug('Filtering dates ..')
+            chunk_filtered_date = ClsChunk(self.filter_chunk(chunk.list, 'date'))
+            if not chunk_filtered_date.list:
                 self.__logger.debug('{:>12} {}'.format('filtered:', str(None)))
-                continue
-            print('chunk_filtered: size: {}'.format(chunk_filtered_keys.length))
-            self.__logger.debug('{:>12} {}'.format('filtered:', chunk_filtered_keys.log_info))
-            # add found lines to the accumulated chunk list
-            for item in chunk_filtered_keys.list:
-                chunks_accumulated.append(item)
+                return
+            self.__logger.debug('{:>12} {}'.format('filtered:', chunk_filtered_date.log_info))
+        else:
+            chunk_filtered_date = ClsChunk(chunk.list)
+        # filter keys
+        self.__logger.debug('Filtering keys ..')
+        chunk_filtered_keys = ClsChunk(self.bucket_chunk(chunk_filtered_date.list))
+        if not chunk_filtered_keys.list:
+            self.__logger.debug('{:>12} {}'.format('filtered:', str(None)))
+            return
+        print('chunk_filtered: size: {}'.format(chunk_filtered_keys.length))
+        self.__logger.debug('{:>12} {}'.format('filtered:', chunk_filtered_keys.log_info))
+        self.__lines_found += len(chunk_filtered_keys.list)
+        for item in chunk_filtered_keys.list:
+            self.__logger.debug('{:8}: {}'.format(item.number, item.text.rstrip()))
+
+    def finish_search(self):
+        """
+        This function builds the parser result from the lines found
+        in all processed chunks. The events are rendered one by one,
+        while the result is iterated (see iter_results).
+
+        :return: Parser result, iterator of dictionaries
+        """
+        intend = LOG_INTEND * ' '
 
         # log search result
         self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
-        self.__logger.info('Found ' + str(len(chunks_accumulated)) + ' lines in the log file.')
-        self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
-        self.__logger.debug('Found lines:')
-        for c_acc in chunks_accumulated:
-            self.__logger.debug('{:8}: {}'.format(c_acc['number'], c_acc['text'].rstrip()))
+        self.__logger.info('Found ' + str(self.__lines_found) + ' lines in the log file.')
 
         # combi list - combines search and found items
         self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
         self.__logger.debug('Combining search and found items in combi list.')
-        combi_list = self.combi_list(chunks_accumulated)
+        combi_list = self.combi_list()
         print('combi list: size: {}\n'.format(len(combi_list)))
         self.__logger.debug('combi list: size: {}'.format(len(combi_list)))
         for c_item in combi_list:
@@ -1048,165 +2155,246 @@ class ClsParser:
         self.__logger.info('Events:')
         self.__logger.info(intend + '{:12}{}'.format('status:', combi_list_normalized_filtered.status_tuples))
         self.__logger.info(LOG_MAX_TEXT_LEN * '-')
-        self.__logger.info('Compose a list of events each in form of a dictionary.')
+        self.__logger.info('Compose the events each in form of a dictionary.')
+        return self.iter_results(combi_list_normalized_filtered.list)
 
+    def iter_results(self, combi_list):
+        """
+        This function renders the events of the normalized and filtered combi list one by one,
+        so that they are provided to the outputs without keeping all of them in memory.
+
+        :param combi_list: List of the normalized and filtered combi items
+        :return: Generator of result dictionaries
+        """
         self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
         self.__logger.debug('Calculate result tuples (T) and create result dictionaries (D).')
         i = 0
-        for combi_item in combi_list_normalized_filtered.list:
+        for combi_item in combi_list:
             i += 1
             # calculate result tuples for replacing placeholders in the final result dictionary
             result_tuples = self.result_tuples(combi_item)
             self.__logger.debug('{}{}: {}'.format('T', i, result_tuples))
             # replace placeholders in the result dictionary by tuple values
-            result_dict = self.fill_placeholders(self.__parser_result_fields, result_tuples)
+            result_dict = self.fill_placeholders(result_tuples)
             self.__logger.debug('{}{}: {}'.format('D', i, result_dict))
-            # accumulate list of result dictionaries
-            result_list.append(result_dict)
-
-        return result_list
+            yield result_dict
 
-    def out_key_tuples(self, data, chunk_key):
-        """
-        This function provides a list of unique tuples for the http chunk sending.
-        Each tuple represents a key for collecting events to be sent in one chunk.
-        :return: List of unique tuples for the http chunk sending
-
-        Example:
-        [('customerId','azse_datasynch'), ('customerId','hei_datasynch'), ('customerId','azse_datasynch')]
-        """
-        t_list = []
-        for d in data:
-            for (k, v) in d.items():
-                if k == chunk_key:
-                    t_list.append((k, v))
-        # create a set of tuples in order to obtain unique items
-        t_set = set(t_list)
-        # return the set as a list of tuples
-        return list(t_set)
-
-    def curl_token(self, con):
+    def http_token(self, con):
         """
         This function gets an authentication token from the ssd,
         after posting username and password.
         :param con: connection from connections file.
         :return: authentication token
         """
-        protocol = con['protocol']
-        port = con['port']
-        host = con['hostName']
         path = con['tokenPath']
-        user = con['userName']
-        pw = con['passWord']
-
-        content_type = "content-type: application/x-www-form-urlencoded"
-        url = protocol + "://" + host + ":" + port + path
-        data = "client_id=pushClient&grant_type=password&scope=sportal&username=" + user + "&password=" + pw
+        data = urllib.parse.urlencode([('client_id', 'pushClient'), ('grant_type', 'password'), ('scope', 'sportal'),
+                                       ('username', con['userName']), ('password', con['passWord'])])
+        headers = {'content-type': 'application/x-www-form-urlencoded'}
 
         self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
-        self.__logger.debug('Get auth token from url: ' + url)
-        result = ''
-        with Popen(["curl", "-XPOST", "-H", content_type, url, "-d", data],
-                   stdout=PIPE, bufsize=1, universal_newlines=True) as p:
-            for line in p.stdout:
-                result = result + line
+        self.__logger.debug('Get auth token from url: ' + con['protocol'] + "://" + con['hostName'] + ":" +
+                            str(con['port']) + path)
+        status, reason, result = httpout.POOL.request(con, 'POST', path, data, headers)
+        self.__logger.debug('Token response: ' + str(status) + ' ' + reason)
         return result
 
-    def curl_result(self, data, con):
+    def http_jobs(self, groups, con):
         """
-        This functions posts the data into the target url via curl.
+        This functions provides the delivery jobs posting the data into the target url.
         The data is sent in chunks that are built on the basis of the same customerId.
         Because the target url does contain the customerId in it's path.
-        Every single json event is sent separately
-        :param data: Data to be sent to the target url.
+        Every single json event is sent separately, requests to a host
+        share kept alive connections (see httpout.ClsHttpPool).
+        :param groups: Json events partitioned by the value of the chunkKey (out.http.chunkKey),
+                       see dicttools.ClsGroupBy
         :param con: connection from connections file.
-        :return: True - success, False - failed.
+        :return: List of delivery jobs, one for every event
         """
         intend = LOG_INTEND * ' '
 
         try:
             protocol = con['protocol']
-            port = con['port']
+            port = str(con['port'])
             host = con['hostName']
             path = con['eventPath']
         except AttributeError:
-            return False
-
-        json_token = json.loads(self.curl_token(con))  # contains multiple token parameters
-        access_token = json_token['access_token']  # extract the access token string exclusively
-        authorization = "authorization: Bearer " + access_token
-        content_type = "content-type: application/json"
+            return []
 
         self.__logger.info(LOG_MAX_TEXT_LEN * '-')
-        self.__logger.info('Send ' + str(len(data)) + ' events via cURL to SSD.')
-        result = ''
-        for (k, v) in self.out_key_tuples(data, self.__parser_http_out_chunk_key):
-            # calculate chunk of result list due to chunkKey
-            c_list = [d for d in data if d[k] == v]
-            url = protocol + "://" + host + ":" + port + path.replace(PH_CUSTOMER_ID, v)
+        self.__logger.info('Send ' + str(groups.count) + ' events via HTTP to SSD.')
+        jobs = []
+        # chunks of the result due to chunkKey
+        for v, c_list in groups.groups.items():
+            event_path = path.replace(PH_CUSTOMER_ID, v)
             self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
             self.__logger.debug(intend + 'Send ' + str(len(c_list)) + ' events for ' + v + '.')
-            self.__logger.debug(intend + 'URL: ' + url)
+            self.__logger.debug(intend + 'URL: ' + protocol + "://" + host + ":" + port + event_path)
+            if self.__parser_http_out_batch_active:
+                # send the json events as arrays
+                batches = httpout.batches(c_list, self.__parser_http_out_batch_max_events,
+                                          self.__parser_http_out_batch_max_bytes)
+                for i, batch in enumerate(batches, start=1):
+                    jobs.append(delivery.ClsDeliveryJob(host + ':' + port, 'batch ' + str(i) + ' of ' +
+                                                        str(len(batch)) + ' events for ' + v + ' via HTTP',
+                                                        functools.partial(self.http_send_batch, con, event_path,
+                                                                          batch)))
+                continue
             # send every single json event separately
-            for c_event in c_list:
-                with Popen(["curl", "-XPOST", "-H", authorization, "-H", content_type, url, "-d", json.dumps(c_event)],
-                           stdout=PIPE, bufsize=1, universal_newlines=True) as p:
-                    for line in p.stdout:
-                        result += line
-            result += '\n'
-        return True
+            for i, c_event in enumerate(c_list, start=1):
+                jobs.append(delivery.ClsDeliveryJob(host + ':' + port, 'event ' + str(i) + ' for ' + v + ' via HTTP',
+                                                    functools.partial(self.http_send, con, event_path, c_event)))
+        return jobs
 
-    def mail_result(self, data, con):
+    def http_send(self, con, path, body, compress=False):
+        """
+        This function posts one event or a batch of events, the auth token is cached until it expires.
+        :param con: connection from connections file.
+        :param path: Path of the target url
+        :param body: json event or array of json events
+        :param compress: True - the body is sent gzip compressed
+        :return: Tuple (ok, detail)
+        :raises delivery.ClsRetry: The target is temporarily not available.
+        """
+        access_token = httpout.TOKENS.token(con, self.http_token)
+        headers = {'authorization': 'Bearer ' + access_token, 'content-type': 'application/json'}
+        if compress:
+            body = gzip.compress(body.encode('utf-8'), compresslevel=httpout.HTTP_GZIP_LEVEL)
+            headers['content-encoding'] = 'gzip'
+        status, reason, result = httpout.POOL.request(con, 'POST', path, body, headers)
+        if status == 401:
+            # token expired or revoked, send the event again with a new token
+            httpout.TOKENS.invalidate(con, access_token)
+            headers['authorization'] = 'Bearer ' + httpout.TOKENS.token(con, self.http_token)
+            status, reason, result = httpout.POOL.request(con, 'POST', path, body, headers)
+        detail = str(status) + ' ' + reason
+        if status in delivery.RETRY_STATUS:
+            raise delivery.ClsRetry(detail)
+        if not 200 <= status < 300:
+            return False, (detail + ' ' + result).strip()
+        return True, detail
+
+    def http_send_batch(self, con, path, bodies):
         """
-        This functions sends the data to a mailbox.
+        This function posts a batch of events as json array.
+        If the target rejects the batch, the events are posted one by one,
+        like further batches to the same target.
+        :param con: connection from connections file.
+        :param path: Path of the target url
+        :param bodies: List of json events
+        :return: Tuple (ok, detail)
+        :raises delivery.ClsRetry: The target is temporarily not available.
+        """
+        target = (httpout.ClsHttpPool.key(con), path)
+        if target not in self.__parser_http_out_batch_rejected:
+            ok, detail = self.http_send(con, path, '[' + ','.join(bodies) + ']', self.__parser_http_out_batch_gzip)
+            if ok:
+                return ok, detail
+            self.__parser_http_out_batch_rejected.add(target)
+            self.__logger.warning('Batch rejected (' + detail + '), send the events one by one to ' + path + '.')
+        # fallback: every single json event, temporary failures are not repeated to avoid duplicate events
+        failed = 0
+        detail = ''
+        for body in bodies:
+            try:
+                ok, detail = self.http_send(con, path, body)
+            except (delivery.ClsRetry, httpout.HTTP_ERRORS) as e:
+                ok, detail = False, str(e)
+            if not ok:
+                failed += 1
+        if failed:
+            return False, str(failed) + ' of ' + str(len(bodies)) + ' events failed, last: ' + detail
+        return True, str(len(bodies)) + ' events sent one by one'
+
+    def mail_jobs(self, groups, con, folder=None):
+        """
+        This functions provides the delivery jobs sending the data to a mailbox.
         The data is sent in chunks that are built on the basis of the same chunkKey (here customerId).
         Because the target mailbox expects the chunkKey enclosed in square brackets in the mail subject.
         All json events of one chunkKey are sent in one e-mail.
-        :param data: Data to be sent to the target url.
+        If the parser folds its mails (out.mail.fold), the events are added to the folder instead
+        and sent together with the events of other parser runs (see mail_fold_jobs).
+        :param groups: Json events partitioned by the value of the chunkKey (out.mail.chunkKey),
+                       see dicttools.ClsGroupBy
         :param con: connection from connections file.
-        :return: True - success, False - failed.
+        :param folder: Mail folder collecting the events of several parser runs or None
+        :return: List of delivery jobs, one for every chunkKey
         """
         intend = LOG_INTEND * ' '
 
         try:
             protocol = con['protocol']
-            host = con['hostName']
             addr_to = con['to']
             addr_from = con['from']
-            subject_ph = con['subject'] # get subject with placeholder
-            body_delim = con['bodyDelimiter']
         except AttributeError:
-            return False
+            return []
 
         self.__logger.info(LOG_MAX_TEXT_LEN * '-')
-        self.__logger.info('Send ' + str(len(data)) + ' events via ' + protocol + ' e-mail to SSD.')
-        body = ''
-        for (k, v) in self.out_key_tuples(data, self.__parser_mail_out_chunk_key):
-            # calculate chunk of result list due to chunkKey
-            c_list = [d for d in data if d[k] == v]
+        if folder is not None and self.__parser_mail_out_fold:
+            self.__logger.info('Collect ' + str(groups.count) + ' events for ' + protocol + ' e-mail to SSD.')
+        else:
+            self.__logger.info('Send ' + str(groups.count) + ' events via ' + protocol + ' e-mail to SSD.')
+        jobs = []
+        # chunks of the result due to chunkKey
+        for v, c_list in groups.groups.items():
             self.__logger.debug(LOG_MAX_TEXT_LEN * '-')
             self.__logger.debug(intend + 'Send ' + str(len(c_list)) + ' events for ' + v + '.')
             self.__logger.debug(intend + 'From: ' + addr_from)
             self.__logger.debug(intend + 'To: ' + addr_to)
-            # calculate mail subject and body
-            subject = subject_ph.replace(PH_CHUNK_KEY, v)
-            body = body_delim + '\n' + json.dumps(c_list) + '\n' + body_delim
-
-            # compose mail
-            msg = MIMEText(body)
-            msg['Subject'] = subject
-            msg['From'] = addr_from
-            msg['To'] = addr_to
-            
-            try:
-                # Send the message via SMTP server.
-                s = smtplib.SMTP(host)
-                s.send_message(msg)
-                s.quit()
-            except Exception as e:
-                self.__logger.error('Failed sending events for '  + v + 'via e-mail to SSD, message: ' + e)                
+            if folder is not None and self.__parser_mail_out_fold:
+                folder.add(con, v, c_list)
+            else:
+                jobs.append(self.mail_job(con, v, c_list))
+        return jobs
 
-        return True
+    @staticmethod
+    def mail_fold_jobs(folder):
+        """
+        This function provides the delivery jobs sending the events collected by a mail folder,
+        one e-mail per connection and chunkKey value.
+        :param folder: Mail folder
+        :return: List of delivery jobs
+        """
+        return [ClsParser.mail_job(con, v, c_list) for con, v, c_list in folder.items]
+
+    @staticmethod
+    def mail_job(con, chunk_value, c_list):
+        """
+        This function composes the e-mail of the events of a chunkKey value.
+        :param con: connection from connections file.
+        :param chunk_value: Value of the chunkKey
+        :param c_list: Json events of the chunkKey value
+        :return: Delivery job sending the e-mail
+        """
+        host = con['hostName']
+        # calculate mail subject and body, the json array of the events
+        subject = con['subject'].replace(PH_CHUNK_KEY, chunk_value)
+        body = con['bodyDelimiter'] + '\n[' + ', '.join(c_list) + ']\n' + con['bodyDelimiter']
+
+        # compose mail
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = con['from']
+        msg['To'] = con['to']
+        return delivery.ClsDeliveryJob(host, 'events for ' + chunk_value + ' via e-mail',
+                                       functools.partial(ClsParser.mail_send, host, msg))
+
+    @staticmethod
+    def mail_send(host, msg):
+        """
+        This function sends one e-mail via the SMTP session to the server (see mailout.ClsMailSender).
+        :param host: SMTP server
+        :param msg: Message
+        :return: Tuple (ok, detail)
+        :raises delivery.ClsConnectError: The server cannot be reached, the message has not been sent.
+        :raises delivery.ClsRetry: The server rejects the message temporarily (4xx reply).
+        """
+        try:
+            mailout.SENDER.send(host, msg)
+        except smtplib.SMTPResponseException as e:
+            if 400 <= e.smtp_code < 500:
+                raise delivery.ClsRetry(str(e.smtp_code) + ' ' + str(e.smtp_error)) from e
+            raise
+        return True, 'sent'
 
     def log_info(self):
         """
@@ -1262,3 +2450,143 @@ class ClsParser:
         print('\tparser_dt_start: {}'.format(self.__parser_dt_start))
         print('\tparser_dt_end: {}'.format(self.__parser_dt_end))
         print('\tparser_group_slice: {}\n'.format(self.__parser_group_slice))
+
+
+class ClsSharedScan:
+    """ This class runs all parsers of one log file in a single pass.
+
+    Every line is read and date parsed once and then handed to the chunks
+    of all parsers whose chunk selection contains the line. Each parser
+    filters its own chunks exactly like in a separate run.
+    """
+
+    def __init__(self, parsers, logger):
+        self.__parsers = parsers
+        self.__logger = logger
+
+    @staticmethod
+    def segments(windows):
+        """
+        Split the chunk windows of all parsers into segments of lines,
+        which are read by the same set of parsers.
+
+        :param windows: List containing the chunk windows of every parser
+        :return: List of tuples, each containing
+                 - first line of the segment
+                 - last line of the segment
+                 - indexes of the parsers reading the segment
+                 - indexes of the parsers whose chunk ends with the segment
+        """
+        points = set()
+        for p_windows in windows:
+            for line_start, line_end in p_windows:
+                points.add(line_start)
+                points.add(line_end + 1)
+        points = sorted(points)
+        segments = []
+        for seg_start, seg_next in zip(points, points[1:]):
+            reading = []
+            completed = []
+            for i, p_windows in enumerate(windows):
+                for line_start, line_end in p_windows:
+                    if line_start <= seg_start <= line_end:
+                        reading.append(i)
+                        if line_end == seg_next - 1:
+                            completed.append(i)
+                        break
+            if reading:
+                segments.append((seg_start, seg_next - 1, reading, completed))
+        return segments
+
+    def run(self):
+        """
+        Run all parsers through the log file.
+
+        :return: List containing the result of every parser, iterators of dictionaries
+        """
+        for obj_parser in self.__parsers:
+            obj_parser.start_search()
+            for chunk_lines in obj_parser.iter_replay_chunks():
+                obj_parser.process_chunk(chunk_lines)
+        windows = [obj_parser.chunk_windows() for obj_parser in self.__parsers]
+        segments = self.segments(windows)
+        if segments:
+            self.__logger.info('Scan the log file once for ' + str(len(self.__parsers)) + ' parsers.')
+            self.scan(segments, windows)
+        return [obj_parser.finish_search() for obj_parser in self.__parsers]
+
+    @staticmethod
+    def last_date(items):
+        """
+        Get the date of the last line item with a date.
+
+        :param items: List of line items
+        :return: datetime or None
+        """
+        for item in reversed(items):
+            if item.date:
+                return item.date
+        return None
+
+    def scan(self, segments, windows):
+        """
+        Read the segments of the log file and hand the lines to the chunks of the parsers.
+
+        :param segments: List of segments as provided by segments()
+        :param windows: List containing the chunk windows of every parser
+        """
+        reader = self.__parsers[segments[0][2][0]]
+        chunks = [[] for _ in self.__parsers]
+        # parsers, which have not read their last chunk yet
+        pending = {i: p_windows[-1][1] for i, p_windows in enumerate(windows) if p_windows}
+        # dates after which the parsers of time ordered logs stop reading
+        time_stops = {i: obj_parser.time_stop_date for i, obj_parser in enumerate(self.__parsers)
+                      if obj_parser.time_stop_date}
+        line_break = reader.line_break
+        fh, line_counter = reader.open_at_line(segments[0][0])
+        with fh:
+            lines = iter(fh.readline, line_break[:0])
+            incomplete = line_break[:0]
+            for seg_start, seg_end, reading, completed in segments:
+                reading = [i for i in reading if i in pending]
+                if not reading:
+                    continue  # all parsers of the segment have stopped reading
+                # skip lines none of the parsers is interested in
+                if seg_start - 1 > line_counter:
+                    skip = seg_start - 1 - line_counter
+                    line_counter += sum(1 for _ in itertools.islice(lines, skip))
+                items = []
+                for line in lines:
+                    if reader.log_checkpoint and not line.endswith(line_break):
+                        incomplete = line
+                        break
+                    line_counter += 1
+                    items.append(reader.line_item(line_counter, line))
+                    if line_counter >= seg_end:
+                        break
+                end_of_file = line_counter < seg_end
+                stopped = []
+                last_date = self.last_date(items) if time_stops else None
+                for i in reading:
+                    if i in time_stops and last_date and last_date > time_stops[i]:
+                        # the time range of the parser ends within the segment
+                        chunks[i].extend(itertools.takewhile(
+                            lambda item: not (item.date and item.date > time_stops[i]), items))
+                        stopped.append(i)
+                    else:
+                        chunks[i].extend(items)
+                for i in (reading if end_of_file else sorted(set(completed).intersection(reading).union(stopped))):
+                    if chunks[i]:
+                        self.__parsers[i].process_chunk(chunks[i])
+                        chunks[i] = []
+                    if end_of_file or i in stopped or pending[i] == seg_end:
+                        if reader.log_checkpoint:
+                            self.__parsers[i].read_position = {'line': line_counter,
+                                                               'offset': reader.read_offset(fh, incomplete)}
+                        del pending[i]
+                if end_of_file or not pending:
+                    break
+            if reader.log_checkpoint:
+                for i in pending:
+                    self.__parsers[i].read_position = {'line': line_counter,
+                                                       'offset': reader.read_offset(fh, incomplete)}
@@ -0,0 +1,126 @@
+import smtplib
+import threading
+import delivery
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+MAIL_TIMEOUT = 30  # seconds to wait for the SMTP server
+# errors of a session closed by the server, the message is sent again on a new session
+MAIL_RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class ClsMailSender:
+    """ This class keeps one SMTP session per mail server for the whole process.
+
+    All messages to a server are sent over its session, one after another.
+    If the server has closed the session in the meantime, the message is sent
+    once more on a new session.
+    """
+
+    def __init__(self, timeout=MAIL_TIMEOUT):
+        self.__timeout = timeout
+        self.__sessions = {}
+        self.__locks = {}
+        self.__lock = threading.Lock()
+        self.__messages = 0
+        self.__connects = 0
+
+    @property
+    def statistics(self):
+        return {'sessions': len(self.__sessions), 'messages': self.__messages, 'connects': self.__connects}
+
+    def configure(self, timeout=MAIL_TIMEOUT):
+        """
+        Set the timeout of new sessions.
+        :param timeout: Seconds to wait for the SMTP server
+        """
+        self.__timeout = timeout
+
+    def host_lock(self, host):
+        with self.__lock:
+            return self.__locks.setdefault(host, threading.Lock())
+
+    def send(self, host, msg):
+        """
+        Send a message via the session to a mail server.
+        :param host: Mail server, 'host' or 'host:port'
+        :param msg: Message
+        :raises delivery.ClsConnectError: The server cannot be reached, the message has not been sent.
+        :raises smtplib.SMTPException: The message is not accepted.
+        :raises OSError: The session failed while sending the message.
+        """
+        with self.host_lock(host):
+            session = self.__sessions.get(host)
+            if session is not None:
+                try:
+                    session.send_message(msg)
+                    self.__messages += 1
+                    return
+                except MAIL_RECONNECT_ERRORS:
+                    self.drop(host)  # closed by the server while idle, send on a new session
+            try:
+                session = smtplib.SMTP(host, timeout=self.__timeout)
+            except OSError as e:
+                raise delivery.ClsConnectError(str(e) or e.__class__.__name__) from e
+            self.__connects += 1
+            self.__sessions[host] = session
+            try:
+                session.send_message(msg)
+            except MAIL_RECONNECT_ERRORS:
+                self.drop(host)
+                raise
+            self.__messages += 1
+
+    def drop(self, host):
+        session = self.__sessions.pop(host, None)
+        if session is not None:
+            try:
+                session.close()
+            except OSError:
+                pass
+
+    def close(self):
+        """
+        Quit all sessions.
+        """
+        for host in list(self.__sessions):
+            with self.host_lock(host):
+                session = self.__sessions.pop(host)
+                try:
+                    session.quit()
+                except (smtplib.SMTPException, OSError):
+                    session.close()
+
+
+class ClsMailFolder:
+    """ This class collects the events of several parser runs, which are sent
+    in one e-mail per connection and chunkKey value.
+    """
+
+    def __init__(self):
+        self.__events = {}  # events by connection id and chunkKey value
+        self.__cons = {}
+
+    def add(self, con, chunk_value, events):
+        """
+        Add the events of a chunkKey value of a parser run.
+        :param con: connection from connections file.
+        :param chunk_value: Value of the chunkKey
+        :param events: List of json events
+        """
+        self.__cons[con['id']] = con
+        self.__events.setdefault((con['id'], chunk_value), []).extend(events)
+
+    @property
+    def items(self):
+        """
+        :return: List of tuples (connection, chunkKey value, events) in the order of their first events
+        """
+        return [(self.__cons[con_id], chunk_value, events) for (con_id, chunk_value), events in self.__events.items()]
+
+
+# sender of the process, shared by all parsers
+SENDER = ClsMailSender()
@@ -0,0 +1,169 @@
+import re
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+KEY_PLACEHOLDER = '%k{}%'  # placeholder of the n-th key in the parser regex
+REGEX_META_CHARS = set('.^$*+?{}[]\\|()')
+# constructs of the parser regex, which make key placeholders optional (negative lookarounds: forbidden)
+REGEX_OPTIONAL = re.compile(r'\||\)[?*]|\)\{0|%k\d+%[?*{]|\(\?[a-zA-Z]*[ix]|\(\?<?!')
+
+
+def is_literal(text):
+    """
+    Check if a key text is a plain literal without regex meta characters.
+    :param text: Key text
+    :return: True if the text matches itself only
+    """
+    return isinstance(text, str) and text != '' and not REGEX_META_CHARS.intersection(text)
+
+
+def strip_classes(regex):
+    """
+    Remove the character classes from a regex. A key placeholder within a character class
+    stands for a set of characters, the key text is not required as a literal.
+    :param regex: Parser regex
+    :return: Regex without its character classes
+    """
+    parts = []
+    i = 0
+    class_start = None  # index of the first character of the current character class
+    while i < len(regex):
+        c = regex[i]
+        if c == '\\':
+            if class_start is None:
+                parts.append(regex[i:i + 2])
+            i += 2
+            continue
+        if class_start is not None:
+            if c == ']' and i > class_start:
+                class_start = None
+        elif c == '[':
+            # a closing bracket in front of the first character (after a negation) is a member of the class
+            class_start = i + 2 if regex[i + 1:i + 2] == '^' else i + 1
+        else:
+            parts.append(c)
+        i += 1
+    return ''.join(parts)
+
+
+class ClsKeyPrefilter:
+    """ This class is a prefilter for the key search of a parser.
+
+    It is built from the key texts of the parser keys hierarchy, which are inserted
+    into the parser regex as literals. Lines containing none of the literals are rejected
+    by one multi-pattern scan. For the remaining lines only the search items, whose
+    literals are all contained in the line, are candidates for the full regex search.
+    With an encoding, the literals are encoded and the prefilter checks lines read as bytes.
+    """
+
+    def __init__(self, search_col, regex, encoding=None):
+        """
+        :param search_col: Search list of the parser
+        :param regex: Parser regex
+        :param encoding: Encoding of the log file for checking lines read as bytes, None - lines are strings
+        :raises UnicodeEncodeError: A literal cannot be encoded.
+        """
+        self.__search_col = search_col
+        self.__literals = []
+        self.__tree = {}  # key level tree: literal (None - any line) -> sub tree, leaf items under key 0
+        self.__active = False
+        self.__can_reject = True
+        self.__any_rx = None
+        regex = strip_classes(regex)
+        if REGEX_OPTIONAL.search(regex):
+            return  # key texts may be optional in a match
+
+        literals = set()
+        for index, item in enumerate(search_col):
+            node = self.__tree
+            required = 0
+            for level, text in enumerate(item['in'], start=1):
+                if KEY_PLACEHOLDER.format(level) in regex and is_literal(text):
+                    literal = text.encode(encoding) if encoding else text
+                    literals.add(literal)
+                    required += 1
+                else:
+                    literal = None
+                node = node.setdefault(literal, {})
+            node.setdefault(0, []).append(index)
+            if not required:
+                self.__can_reject = False
+        if not literals:
+            return
+        # longest literals first, so that the scan finds a literal containing another one
+        self.__literals = sorted(literals, key=len, reverse=True)
+        separator = b'|' if encoding else '|'
+        self.__any_rx = re.compile(separator.join(re.escape(literal) for literal in self.__literals))
+        self.__active = True
+
+    @property
+    def active(self):
+        return self.__active
+
+    @property
+    def literals(self):
+        return self.__literals
+
+    @property
+    def rejecting(self):
+        """
+        True if lines without any literal are rejected, i.e. every search item requires a literal.
+        """
+        return self.__active and self.__can_reject
+
+    def find(self, buffer, pos, endpos):
+        """
+        Find the first literal in a range of a buffer, e.g. of a memory mapped logfile.
+        :param buffer: Buffer of the type of the literals (str or bytes like)
+        :param pos: Offset of the range
+        :param endpos: Offset behind the range
+        :return: Offset of the literal, -1 if there is none
+        """
+        m = self.__any_rx.search(buffer, pos, endpos)
+        return m.start() if m else -1
+
+    def may_match(self, line):
+        """
+        Check if a line contains any literal, without evaluating the search items.
+        :param line: line of logfile
+        :return: False if the line is rejected
+        """
+        if not self.rejecting:
+            return True
+        return self.__any_rx.search(line) is not None
+
+    def candidates(self, line):
+        """
+        Get the search items which may match a line.
+        :param line: line of logfile, bytes if the prefilter has an encoding
+        :return: List of search items in the order of the search list
+        """
+        if not self.__active:
+            return self.__search_col
+        return [self.__search_col[i] for i in self.candidate_indexes(line)]
+
+    def candidate_indexes(self, line):
+        """
+        Get the indexes of the search items which may match a line.
+        :param line: line of logfile, bytes if the prefilter has an encoding
+        :return: Sorted list of indexes into the search list
+        """
+        if not self.__active:
+            return range(len(self.__search_col))
+        if self.__can_reject and not self.__any_rx.search(line):
+            return []
+        present = {literal for literal in self.__literals if literal in line}
+        indexes = []
+        nodes = [self.__tree]
+        while nodes:
+            node = nodes.pop()
+            for literal, sub_node in node.items():
+                if literal == 0:
+                    indexes.extend(sub_node)
+                elif literal is None or literal in present:
+                    nodes.append(sub_node)
+        indexes.sort()
+        return indexes
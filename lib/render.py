@@ -0,0 +1,130 @@
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+VAR_DELIMITER = '%'
+NODE_DICT = 0  # nested dictionary
+NODE_TEXT = 1  # text containing placeholders
+NODE_VALUE = 2  # value without placeholders
+MISSING = object()
+
+
+class ClsRenderPlan:
+    """ This class is a compiled result template (result.fields).
+
+    The template is analysed once: for every leaf the placeholders and the texts
+    between them are recorded. Rendering an event substitutes the placeholder values
+    directly, without copying the template and without searching the leaves.
+
+    As before, a placeholder with a value, which is no string (e.g. a number),
+    replaces the whole leaf by the value, and placeholders without value are kept.
+    """
+
+    def __init__(self, template, placeholder_rx):
+        """
+        :param template: Result template, a possibly nested dictionary
+        :param placeholder_rx: Compiled regular expression matching the known placeholder names
+        """
+        self.__placeholder_rx = placeholder_rx
+        self.__placeholders = set()
+        self.__plan = self.compile(template)
+
+    @property
+    def placeholders(self):
+        """ Names of the placeholders used by the template. """
+        return self.__placeholders
+
+    def compile(self, template):
+        """
+        Compile a (nested) template dictionary.
+        :param template: Template dictionary
+        :return: List of tuples (key, node type, payload)
+        """
+        plan = []
+        for k, v in template.items():
+            if isinstance(v, dict):
+                plan.append((k, NODE_DICT, self.compile(v)))
+            else:
+                segments = self.segments(str(v))
+                if len(segments) > 1 or segments[0][1] is not None:
+                    plan.append((k, NODE_TEXT, (segments, v)))
+                else:
+                    plan.append((k, NODE_VALUE, v))
+        return plan
+
+    def segments(self, text):
+        """
+        Split a text into the placeholders and the texts in front of them.
+        :param text: Template text
+        :return: List of tuples (text, placeholder name or None)
+        """
+        segments = []
+        pos = 0
+        i = text.find(VAR_DELIMITER)
+        while i >= 0:
+            j = text.find(VAR_DELIMITER, i + 1)
+            if j < 0:
+                break
+            name = text[i:j + 1]
+            if self.__placeholder_rx.fullmatch(name):
+                segments.append((text[pos:i], name))
+                self.__placeholders.add(name)
+                pos = j + 1
+                i = text.find(VAR_DELIMITER, pos)
+            else:
+                i = j  # the closing delimiter may open a placeholder
+        segments.append((text[pos:], None))
+        return segments
+
+    def render(self, values):
+        """
+        Render the template for one event.
+        :param values: Dictionary of the placeholder values
+        :return: Result dictionary
+        """
+        return self.render_plan(self.__plan, values)
+
+    def render_plan(self, plan, values):
+        result = {}
+        for k, node_type, payload in plan:
+            if node_type == NODE_TEXT:
+                result[k] = self.render_text(payload, values)
+            elif node_type == NODE_DICT:
+                result[k] = self.render_plan(payload, values)
+            else:
+                result[k] = payload
+        return result
+
+    @staticmethod
+    def render_text(payload, values):
+        """
+        Render one leaf of the template.
+        :param payload: Tuple (segments, template value) of the leaf
+        :param values: Dictionary of the placeholder values in the order of their precedence
+        :return: Rendered value
+        """
+        segments, template_value = payload
+        parts = []
+        replaced = False
+        other_values = []  # placeholders with values, which are no strings
+        for text, name in segments:
+            parts.append(text)
+            if name is not None:
+                v = values.get(name, MISSING)
+                if v is MISSING:
+                    parts.append(name)  # no value, keep the placeholder
+                elif isinstance(v, str):
+                    parts.append(v)
+                    replaced = True
+                else:
+                    other_values.append(name)
+        if other_values:
+            # the value replaces the whole leaf, the first placeholder in the order of the values takes precedence
+            if len(other_values) > 1:
+                order = {name: i for i, name in enumerate(values)}
+                other_values.sort(key=order.get)
+            return values[other_values[0]]
+        if not replaced:
+            return template_value
+        return ''.join(parts)
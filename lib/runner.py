@@ -0,0 +1,109 @@
+import io
+import logging
+import contextlib
+import lopa
+import checkpoint
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+
+class ClsRecordCollector(logging.Handler):
+    """ This class is a logging handler collecting the log records of a worker process.
+
+    The messages are formatted in the worker, so that the records can be sent
+    to the main process and handed to its handlers in the order of the runs.
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.__records = []
+
+    @property
+    def records(self):
+        return self.__records
+
+    def emit(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.__records.append(record)
+
+
+def run_log(log, pars, logger, checkpoints, shared_scan, run, total_runs):
+    """
+    Run the parsers of one log file.
+    The parsers run one after another or, with shared_scan, in a single pass through the log file.
+
+    :param log: Log configuration
+    :param pars: Configurations of the active parsers of the log
+    :param logger: Logger of the log parser
+    :param checkpoints: Checkpoint store or None
+    :param shared_scan: True if all parsers run in a single pass
+    :param run: Number of the first run
+    :param total_runs: Total number of runs
+    :return: Generator of tuples (parser configuration, parser object, result), one for every parser,
+             the result is an iterator of the events
+    """
+    if shared_scan:
+        runs = []
+        lines_number = None
+        for par in pars:
+            logger.info('')
+            logger.info('{} {:>2} {} {:2}'.format('RUN', str(run), '/', str(total_runs)))
+            run += 1
+            obj_parser = lopa.ClsParser(log, par, logger, checkpoints=checkpoints, lines_number=lines_number)
+            obj_parser.log_info()
+            lines_number = obj_parser.log_file_lines_number
+            runs.append(obj_parser)
+        if not runs:
+            return
+        results = lopa.ClsSharedScan(runs, logger).run()
+        for par, obj_parser, l_par in zip(pars, runs, results):
+            yield par, obj_parser, l_par
+    else:
+        for par in pars:
+            logger.info('')
+            logger.info('{} {:>2} {} {:2}'.format('RUN', str(run), '/', str(total_runs)))
+            run += 1
+            obj_parser = lopa.ClsParser(log, par, logger, checkpoints=checkpoints)
+            obj_parser.log_info()
+            yield par, obj_parser, obj_parser.run_search()
+
+
+def run_worker(log, pars, checkpoint_path, level, shared_scan, run, total_runs, env_list):
+    """
+    Run the parsers of one log file in a worker process.
+    The log records and the printed output of the runs are collected
+    and returned together with the results.
+
+    :param log: Log configuration
+    :param pars: Configurations of the parsers to run
+    :param checkpoint_path: Path of the checkpoint file or None
+    :param level: Logging level of the log parser
+    :param shared_scan: True if all parsers run in a single pass
+    :param run: Number of the first run
+    :param total_runs: Total number of runs
+    :param env_list: Environment tuples resolved by the main process
+    :return: Tuple (runs, records, output)
+             - runs: list of tuples (run state, result list), one for every parser
+             - records: list of the log records of the runs
+             - output: printed output of the runs
+    """
+    lopa.ENV_TUPLES.assign(env_list)
+    collector = ClsRecordCollector()
+    logger = logging.Logger('parser', level)
+    logger.addHandler(collector)
+    checkpoints = None
+    if checkpoint_path:
+        checkpoints = checkpoint.ClsCheckpointStore(checkpoint_path)
+    runs = []
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for _, obj_parser, l_par in run_log(log, pars, logger, checkpoints, shared_scan, run, total_runs):
+            # the events are sent to the main process as a whole
+            runs.append((obj_parser.run_state, list(l_par)))
+    return runs, collector.records, output.getvalue()
@@ -0,0 +1,82 @@
+import re
+from collections import OrderedDict
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+RX_DYNAMIC_MAX = 512  # maximum number of dynamically built patterns kept in the registry
+
+
+class ClsRegexRegistry:
+    """ This class is a registry of compiled regular expressions.
+
+    Patterns of the configuration (date regex, event regex, ..) are compiled once,
+    kept for the whole process and shared by all parsers using an identical pattern.
+    Patterns built dynamically at runtime, like the search items combining the parser regex
+    with the keys and their bytes variants, are kept in a bounded LRU cache.
+    The registry counts hits and misses, which helps to size the LRU cache.
+    """
+
+    def __init__(self, max_dynamic=RX_DYNAMIC_MAX):
+        self.__max_dynamic = max_dynamic
+        self.__pinned = {}
+        self.__dynamic = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def pattern(self, pattern):
+        """
+        Get the compiled regular expression of a configured pattern.
+        The compiled pattern is kept as long as the process runs.
+        :param pattern: Regular expression string
+        :return: Compiled regular expression
+        """
+        try:
+            rx = self.__pinned[pattern]
+            self.__hits += 1
+        except KeyError:
+            rx = re.compile(pattern)
+            self.__pinned[pattern] = rx
+            self.__misses += 1
+        return rx
+
+    def dynamic(self, pattern):
+        """
+        Get the compiled regular expression of a pattern built at runtime.
+        The least recently used patterns are dropped, if the cache is full.
+        :param pattern: Regular expression string
+        :return: Compiled regular expression
+        """
+        rx = self.__pinned.get(pattern)
+        if rx is not None:
+            self.__hits += 1
+            return rx
+        try:
+            rx = self.__dynamic[pattern]
+            self.__dynamic.move_to_end(pattern)
+            self.__hits += 1
+        except KeyError:
+            rx = re.compile(pattern)
+            self.__dynamic[pattern] = rx
+            self.__misses += 1
+            if len(self.__dynamic) > self.__max_dynamic:
+                self.__dynamic.popitem(last=False)
+                self.__evictions += 1
+        return rx
+
+    @property
+    def statistics(self):
+        """
+        Statistics about the usage of the registry.
+        :return: List of tuples (name, value)
+        """
+        return [('pinned', len(self.__pinned)), ('dynamic', len(self.__dynamic)),
+                ('dynamicMax', self.__max_dynamic), ('hits', self.__hits),
+                ('misses', self.__misses), ('evictions', self.__evictions)]
+
+
+# registry shared by all parsers of the process
+REGISTRY = ClsRegexRegistry()
@@ -0,0 +1,32 @@
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+SHARD_MIN_SIZE = 4 * 1024 * 1024  # minimum number of bytes of a shard
+
+
+def boundaries(file_path, start, end, count, min_size=SHARD_MIN_SIZE):
+    """
+    Split a byte range of a file into shards of about the same size.
+    Every shard starts at the beginning of a line.
+
+    :param file_path: Path of the file
+    :param start: Offset of the byte range, the beginning of a line
+    :param end: Offset behind the byte range
+    :param count: Maximum number of shards
+    :param min_size: Minimum number of bytes of a shard
+    :return: List of the offsets of the shards followed by the end of the byte range
+    """
+    count = max(1, min(count, (end - start) // max(min_size, 1)))
+    offsets = [start]
+    with open(file_path, 'rb') as fh:
+        for i in range(1, count):
+            # move to the line start following the split point
+            fh.seek(start + i * (end - start) // count - 1)
+            fh.readline()
+            offset = fh.tell()
+            if offsets[-1] < offset < end:
+                offsets.append(offset)
+    offsets.append(end)
+    return offsets
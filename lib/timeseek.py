@@ -0,0 +1,69 @@
+import os
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+SEEK_MIN_RANGE = 64 * 1024  # bisection stops, if the remaining byte range is smaller
+SEEK_MAX_RESYNC = 1024 * 1024  # maximum number of bytes read at a probe to find a dated line
+
+
+def first_offset(file_path, get_datetime, dt_start, encoding, min_range=SEEK_MIN_RANGE):
+    """
+    Find the position in front of the first line dated at or after dt_start
+    in a chronologically ordered log file by bisection of byte offsets.
+    At every probe the search resynchronises to the next line with a date.
+
+    :param file_path: Path of the log file
+    :param get_datetime: Function extracting the datetime of a line or returning None
+    :param dt_start: Start of the time range
+    :param encoding: Encoding of the log file
+    :param min_range: Size of the byte range, at which the bisection stops
+    :return: Byte offset of a line start; all dated lines in front of it are older than dt_start
+    """
+    with open(file_path, 'rb') as fh:
+        lo = 0
+        hi = os.fstat(fh.fileno()).st_size
+        while hi - lo > min_range:
+            mid = (lo + hi) // 2
+            # move to the line start following mid - 1
+            fh.seek(mid - 1)
+            fh.readline()
+            dt = None
+            resync_end = fh.tell() + SEEK_MAX_RESYNC
+            while fh.tell() < resync_end:
+                line = fh.readline()
+                if not line:
+                    break
+                dt = get_datetime(line.decode(encoding, 'replace'))
+                if dt:
+                    break
+            if dt and dt < dt_start:
+                lo = fh.tell()  # the first line in time range follows this line
+            else:
+                hi = mid
+        return lo
+
+
+def count_lines(file_path, start, end, block_size=1024 * 1024):
+    """
+    Count the line breaks within a byte range of a file.
+
+    :param file_path: Path of the file
+    :param start: Offset of the byte range
+    :param end: Offset behind the byte range
+    :param block_size: Number of bytes read at once
+    :return: Number of line breaks
+    """
+    count = 0
+    with open(file_path, 'rb') as fh:
+        fh.seek(start)
+        pos = start
+        while pos < end:
+            block = fh.read(min(block_size, end - pos))
+            if not block:
+                break
+            count += block.count(b'\n')
+            pos += len(block)
+    return count
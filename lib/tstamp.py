@@ -0,0 +1,216 @@
+import re
+import time
+import datetime
+from operator import itemgetter
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+MONTH_NAMES = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+MONTH_NAMES_FULL = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september',
+                    'october', 'november', 'december']
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+WEEKDAY_NAMES_FULL = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+# regular expressions of the supported directives, in line with time.strptime
+DIRECTIVE_REGEX = {
+    'd': r'(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])',
+    'm': r'(?P<m>1[0-2]|0[1-9]|[1-9])',
+    'Y': r'(?P<Y>\d\d\d\d)',
+    'y': r'(?P<y>\d\d)',
+    'H': r'(?P<H>2[0-3]|[0-1]\d|\d)',
+    'M': r'(?P<M>[0-5]\d|\d)',
+    'S': r'(?P<S>6[0-1]|[0-5]\d|\d)',
+    'f': r'(?P<f>[0-9]{1,6})',
+    'b': r'(?P<b>' + '|'.join(MONTH_NAMES) + ')',
+    'B': r'(?P<B>' + '|'.join(MONTH_NAMES_FULL) + ')',
+    'a': r'(?:' + '|'.join(WEEKDAY_NAMES) + ')',
+    'A': r'(?:' + '|'.join(WEEKDAY_NAMES_FULL) + ')',
+    '%': '%',
+}
+# widths of zero padded numeric directives for parsing by position
+DIRECTIVE_WIDTH = {'d': 2, 'm': 2, 'Y': 4, 'H': 2, 'M': 2, 'S': 2}
+# ISO-8601 timestamp the fields are rearranged to, with the defaults of strptime
+ISO_FIELDS = [('Y', '1900'), '-', ('m', '01'), '-', ('d', '01'), 'T', ('H', '00'), ':', ('M', '00'), ':', ('S', '00')]
+
+
+def english_names():
+    """
+    Check if the current locale uses the english month and weekday names,
+    which are expected by the name directives.
+    :return: True if the names are english
+    """
+    t = (2015, 1, 5, 0, 0, 0, 0, 5, 0)
+    return time.strftime('%b %B %a %A', t).lower() == 'jan january mon monday'
+
+
+class ClsTimestampParser:
+    """ This class converts timestamp strings into datetime values.
+
+    Instead of calling datetime.strptime for every string, it is specialised for one
+    date format: the fields of zero padded numeric layouts like '%d.%m.%Y %H:%M:%S'
+    are taken by position and converted as ISO-8601 timestamp by datetime.fromisoformat,
+    other layouts are converted by a compiled regular expression. The most
+    recently converted string is remembered, as consecutive lines often share a timestamp.
+    Formats with unsupported directives are converted by datetime.strptime.
+    """
+
+    def __init__(self, date_format):
+        self.__format = date_format
+        self.__length = 0  # length of timestamps for parsing by position
+        self.__separators = None  # getter of the separator characters and their expected values
+        self.__slices = None  # slices of the timestamp composing the ISO-8601 timestamp
+        self.__rx = None
+        self.__last_string = None
+        self.__last_datetime = None
+        if isinstance(date_format, str):
+            self.positions(date_format)
+            self.__rx = self.regex(date_format)
+
+    @property
+    def format(self):
+        return self.__format
+
+    @property
+    def specialised(self):
+        return self.__rx is not None
+
+    def positions(self, date_format):
+        """
+        Prepare parsing by position, if the date format is a zero padded numeric format.
+        :param date_format: Date format in strptime notation
+        """
+        fields = {}
+        separators = []
+        sample = ''  # timestamp with the separators at their positions
+        pos = 0
+        i = 0
+        while i < len(date_format):
+            c = date_format[i]
+            if c == '%':
+                if i + 1 >= len(date_format) or date_format[i + 1] not in DIRECTIVE_WIDTH:
+                    return
+                directive = date_format[i + 1]
+                if directive in fields:
+                    return
+                fields[directive] = slice(pos, pos + DIRECTIVE_WIDTH[directive])
+                sample += DIRECTIVE_WIDTH[directive] * '0'
+                pos += DIRECTIVE_WIDTH[directive]
+                i += 2
+            else:
+                separators.append(pos)
+                sample += c
+                pos += 1
+                i += 1
+        if not fields:
+            return
+        self.__length = pos
+        self.__slices = [fields.get(f[0], f[1]) if isinstance(f, tuple) else f for f in ISO_FIELDS]
+        if separators:
+            getter = itemgetter(*separators)
+            self.__separators = (getter, getter(sample))
+
+    @staticmethod
+    def regex(date_format):
+        """
+        Build the regular expression matching timestamps of a date format.
+        :param date_format: Date format in strptime notation
+        :return: Compiled regular expression or None, if the format contains unsupported directives
+        """
+        parts = []
+        i = 0
+        while i < len(date_format):
+            c = date_format[i]
+            if c == '%':
+                if i + 1 >= len(date_format):
+                    return None
+                directive = date_format[i + 1]
+                if directive not in DIRECTIVE_REGEX:
+                    return None
+                if directive in 'bBaA' and not english_names():
+                    return None
+                parts.append(DIRECTIVE_REGEX[directive])
+                i += 2
+            elif c.isspace():
+                # like strptime, whitespace matches any whitespace sequence
+                while i < len(date_format) and date_format[i].isspace():
+                    i += 1
+                parts.append(r'\s+')
+            else:
+                parts.append(re.escape(c))
+                i += 1
+        return re.compile(''.join(parts), re.IGNORECASE)
+
+    def parse(self, dt_string):
+        """
+        Convert a timestamp string into a datetime value.
+        :param dt_string: Timestamp string
+        :return: datetime
+        :raises ValueError: The string does not match the date format.
+        :raises TypeError: There is no date format.
+        """
+        if dt_string == self.__last_string:
+            return self.__last_datetime
+        dt = None
+        if self.__slices and len(dt_string) == self.__length:
+            try:
+                dt = self.parse_positions(dt_string)
+            except ValueError:
+                dt = None
+        if dt is None and self.__rx is not None:
+            try:
+                dt = self.parse_regex(dt_string)
+            except ValueError:
+                dt = None  # e.g. day out of range, let strptime raise the error
+        if dt is None:
+            dt = datetime.datetime.strptime(dt_string, self.__format)
+        self.__last_string = dt_string
+        self.__last_datetime = dt
+        return dt
+
+    def parse_positions(self, dt_string):
+        """
+        Convert a timestamp string of a zero padded numeric format by position.
+        :param dt_string: Timestamp string with the length of the format
+        :return: datetime or None, if the separators do not fit
+        :raises ValueError: A field is no number or out of range.
+        """
+        if self.__separators:
+            getter, values = self.__separators
+            if getter(dt_string) != values:
+                return None
+        return datetime.datetime.fromisoformat(''.join([dt_string[f] if isinstance(f, slice) else f
+                                                        for f in self.__slices]))
+
+    def parse_regex(self, dt_string):
+        """
+        Convert a timestamp string by the regular expression of the format.
+        :param dt_string: Timestamp string
+        :return: datetime or None, if the string does not match
+        """
+        m = self.__rx.fullmatch(dt_string)
+        if not m:
+            return None
+        g = m.groupdict()
+        if g.get('Y'):
+            year = int(g['Y'])
+        elif g.get('y'):
+            year = int(g['y'])
+            year += 2000 if year < 69 else 1900
+        else:
+            year = 1900
+        if g.get('m'):
+            month = int(g['m'])
+        elif g.get('b'):
+            month = MONTH_NAMES.index(g['b'].lower()) + 1
+        elif g.get('B'):
+            month = MONTH_NAMES_FULL.index(g['B'].lower()) + 1
+        else:
+            month = 1
+        second = int(g.get('S') or 0)
+        if second > 59:
+            return None  # leap seconds are handled by strptime
+        microsecond = int((g.get('f') or '0').ljust(6, '0'))
+        return datetime.datetime(year, month, int(g.get('d') or 1), int(g.get('H') or 0), int(g.get('M') or 0),
+                                 second, microsecond)
@@ -1,13 +1,25 @@
 import yaml
 import logging
 import logging.config
-import json
 import sys
 import getopt
+import signal
+import json
+import contextlib
+import concurrent.futures
 
 # my modules
 sys.path.append('./lib')
 import lopa
+import checkpoint
+import rxregistry
+import runner
+import httpout
+import delivery
+import mailout
+import jsonout
+import dicttools
+import follow
 
 __author__ = 'Ralf'
 
@@ -24,22 +36,200 @@ def show_usage():
 """Usage: logparser.py [options ...]
 Options:
 -c, --config-file FILE  Set up the config file to use, default ./config/logparser.yml
+-f, --follow    Keep following the log files for appended lines after the run, until the process is stopped
 -o, --conn-file FILE  Set up the connection file to use, default ./config/connections.yml
 -h, --help      This help text
+-s, --shared-scan   Run all parsers of a log file in a single pass through the file
+-w, --workers N     Run the parsers in N worker processes, results are provided in the configured order
     --no-send   Don't send data"""
     print('{}'.format(s_usage))
 
 
+def output_result(obj_parser, events, par, conns, no_send, obj_delivery, mail_folder, logger, fha, parser_files=None):
+    """
+    This function provides the events of one parser run to the configured outputs
+    and records the checkpoint of the run afterwards.
+    The events are written to the parser file and the summary file one by one as they are rendered.
+    The http and mail outputs keep the json events partitioned by chunkKey and send them afterwards.
+    :param obj_parser: Parser object of the run
+    :param events: Result of the run, iterable of event dictionaries
+    :param par: Parser configuration
+    :param conns: Connections configuration
+    :param no_send: True if data shall not be sent
+    :param obj_delivery: Delivery sending the data of all connections concurrently
+    :param mail_folder: Mail folder collecting the events of parsers, which fold their e-mails
+    :param logger: Logger of the log parser
+    :param fha: Json writer of the summary file
+    :param parser_files: Json writers kept open for the parser files of several runs (--follow),
+                         None - the parser file is written by this run only
+    """
+    # connections of the http and mail output, if --no-send is active than don't send data (used for testing purposes)
+    http_cons = []
+    mail_cons = []
+    if not no_send:
+        # loop through all connections specified in the connections file
+        for con in conns['connections']:
+            if 'http' in par['out'] and con['id'] in par['out']['http']['connections']:
+                http_cons.append(con)
+            if 'mail' in par['out'] and con['id'] in par['out']['mail']['connections']:
+                mail_cons.append(con)
+    http_groups = dicttools.ClsGroupBy(par['out']['http']['chunkKey']) if http_cons else None
+    mail_groups = dicttools.ClsGroupBy(par['out']['mail']['chunkKey']) if mail_cons else None
+    with contextlib.ExitStack() as stack:
+        fh = None
+        # check if the output to a file is configured
+        if 'file' in par['out']:
+            # write the parser specific result sets to a file
+            file_args = (obj_parser.result_file_path, par['out']['file'].get('format', jsonout.FORMAT_JSON),
+                         par['out']['file'].get('gzip') == 'yes')
+            if parser_files is None:
+                fh = stack.enter_context(jsonout.ClsJsonWriter(*file_args))
+            else:
+                fh = parser_files.open(*file_args)  # events of the runs before are kept
+            count = fh.count
+            logger.info(lopa.LOG_MAX_TEXT_LEN * '-')
+            logger.info('{} {}'.format('Write events to parser file', fh.name))
+        for event in events:
+            if fh:
+                fh.write(event)  # file with parser events
+            fha.write(event)  # summary file
+            if http_groups or mail_groups:
+                text = json.dumps(event)
+                if http_groups:
+                    http_groups.add(event, text)
+                if mail_groups:
+                    mail_groups.add(event, text)
+        if fh:
+            logger.info('{} {} {}'.format('Wrote', fh.count - count, 'events to parser file'))
+            logger.info(lopa.LOG_MAX_TEXT_LEN * '-')
+    jobs = []
+    for con in http_cons:
+        jobs += obj_parser.http_jobs(http_groups, con)
+    for con in mail_cons:
+        jobs += obj_parser.mail_jobs(mail_groups, con, mail_folder)
+    if jobs:
+        report = obj_delivery.run(jobs)
+        logger.info('{} {}'.format('Delivery:', report.summary))
+    # remember up to which line the log file has been parsed
+    obj_parser.commit_checkpoint()
+
+
+def summary_writer(cfg):
+    """
+    This function opens the summary file containing the events of all runs.
+    :param cfg: Configuration of the log parser
+    :return: Json writer of the summary file
+    """
+    return jsonout.ClsJsonWriter(cfg['out']['file']['pathName'] + '/' + cfg['out']['file']['fileName'],
+                                 cfg['out']['file'].get('format', jsonout.FORMAT_JSON),
+                                 cfg['out']['file'].get('gzip') == 'yes')
+
+
+def send_folded_mails(mail_folder, obj_delivery, logger):
+    """
+    This function sends the e-mails folded from several parser runs.
+    :param mail_folder: Mail folder collecting the events of parsers, which fold their e-mails
+    :param obj_delivery: Delivery sending the data of all connections concurrently
+    :param logger: Logger of the log parser
+    """
+    jobs = lopa.ClsParser.mail_fold_jobs(mail_folder)
+    if jobs:
+        logger.info(lopa.LOG_MAX_TEXT_LEN * '-')
+        logger.info('{} {}'.format('Send folded e-mails:', len(jobs)))
+        report = obj_delivery.run(jobs)
+        logger.info('{} {}'.format('Delivery:', report.summary))
+
+
+def follow_logs(cfg, conns, checkpoints, no_send, obj_delivery, logger, fha, parser_files):
+    """
+    This function keeps following the log files for appended lines (--follow),
+    until the process is stopped by SIGINT or SIGTERM. Every round of appended lines
+    is parsed by the active parsers of the log file, the events are provided to the outputs
+    like the events of a run and are added to the summary file and the parser files of the run.
+    :param cfg: Configuration of the log parser
+    :param conns: Connections configuration
+    :param checkpoints: Checkpoint store or None
+    :param no_send: True if data shall not be sent
+    :param obj_delivery: Delivery sending the data of all connections concurrently
+    :param logger: Logger of the log parser
+    :param fha: Json writer of the summary file, kept open while following
+    :param parser_files: Json writers of the parser files, kept open while following
+    """
+    logger.info(lopa.LOG_MAX_TEXT_LEN * '=')
+    logger.info('FOLLOW LOG FILES')
+    logger.info(lopa.LOG_MAX_TEXT_LEN * '=')
+    if checkpoints:
+        checkpoints.load()  # the checkpoints of the run, as saved by all processes
+    # parser objects of the log files, created once and used for all rounds
+    log_runs = {}
+    for log in cfg['logs']:
+        log_pars = [par for par in cfg['parser'] if par['active'] == 'yes' and log['id'] in par['logId']]
+        runs = []
+        lines_number = None
+        for par in log_pars:
+            obj_parser = lopa.ClsParser(log, par, logger, checkpoints=checkpoints, lines_number=lines_number)
+            lines_number = obj_parser.log_file_lines_number
+            runs.append((par, obj_parser))
+        # every parser continues from its own position, parsers at the same position
+        # (e.g. with the checkpoints of the same run) share a follower reading the appended lines once
+        positions = {}
+        for par, obj_parser in runs:
+            positions.setdefault(obj_parser.follow_position(), []).append((par, obj_parser))
+        try:
+            for position_runs in positions.values():
+                log_runs[follow.ClsLogFollower(position_runs[0][1], logger)] = position_runs
+        except ValueError as e:
+            logger.warning(str(e))
+    if not log_runs:
+        logger.info('No log file to follow.')
+        return
+
+    def emit(rounds):
+        mail_folder = mailout.ClsMailFolder()
+        count = fha.count
+        for follower, items in rounds:
+            for par, obj_parser in log_runs[follower]:
+                logger.info('')
+                logger.info('{} {} {} {} {}'.format('FOLLOW', obj_parser.log_id, obj_parser.parser_id,
+                                                    len(items), 'lines'))
+                events = obj_parser.follow_result(items)
+                obj_parser.read_position = follower.position
+                output_result(obj_parser, events, par, conns, no_send, obj_delivery, mail_folder, logger, fha,
+                              parser_files)
+        send_folded_mails(mail_folder, obj_delivery, logger)
+        # the events of the round are readable in the files, which are completed when following stops
+        fha.flush()
+        parser_files.flush()
+        logger.info('{} {} {}'.format('Wrote', fha.count - count, 'events to summary file ' + fha.name))
+
+    cfg_follow = cfg.get('follow') or {}
+    loop = follow.ClsFollowLoop(list(log_runs), logger, cfg_follow.get('interval', follow.FOLLOW_INTERVAL),
+                                cfg_follow.get('latency', follow.FOLLOW_LATENCY),
+                                cfg_follow.get('maxLines', follow.FOLLOW_MAX_LINES))
+    # stop after the current round, the lines collected so far are parsed before exiting
+    signal.signal(signal.SIGINT, lambda signum, frame: loop.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: loop.stop())
+    try:
+        loop.run(emit)
+    finally:
+        mailout.SENDER.close()
+    logger.info('Stopped following the log files.')
+
+
 def main():
 
     # default values
     c_file = lopa.CONFIG_FILE
     o_file = lopa.CONN_FILE
     no_send = False
+    shared_scan = False
+    workers = 0
+    follow_mode = False
 
     # get command line options
     try:
-        opts, args = getopt.getopt(sys.argv[1:], "hc:o:", ["config-file=", "conn-file=", "no-send"])
+        opts, args = getopt.getopt(sys.argv[1:], "hc:fo:sw:", ["config-file=", "follow", "conn-file=", "shared-scan",
+                                                               "workers=", "no-send"])
     except getopt.GetoptError:
         show_usage()
         sys.exit(2)
@@ -49,8 +239,18 @@ def main():
             sys.exit()
         elif opt in ("-c", "--config-file"):
             c_file = arg
+        elif opt in ("-f", "--follow"):
+            follow_mode = True
         elif opt in ("-o", "--conn-file"):
             o_file = arg
+        elif opt in ("-s", "--shared-scan"):
+            shared_scan = True
+        elif opt in ("-w", "--workers"):
+            try:
+                workers = int(arg)
+            except ValueError:
+                show_usage()
+                sys.exit(2)
         elif opt == "--no-send":
             no_send = True
 
@@ -82,47 +282,86 @@ def main():
                 if log['id'] in par['logId']:
                     total_runs += 1
 
-    run = 0
-    l_all = []
-    # read configuration file
-    with open(cfg['out']['file']['pathName'] + '/' + cfg['out']['file']['fileName'], 'w') as fha:
-        # loop through all specified log files
-        for log in cfg['logs']:
-            # loop through all specified parsers
-            for par in cfg['parser']:
-                if par['active'] == 'yes':
-                    if log['id'] in par['logId']:
-                        run += 1
-                        logger.info('')
-                        logger.info('{} {:>2} {} {:2}'.format('RUN', str(run), '/', str(total_runs)))
-                        obj_parser = lopa.ClsParser(log, par, logger)
-                        obj_parser.log_info()
-                        l_par = obj_parser.result_list
-                        # if --no-send is active than don't send data (used for testing purposes)
-                        if not no_send:
-                            # loop through all connections specified in the connections file
-                            for con in conns['connections']:
-                                # check which output is configured and provide data accordingly
-                                if 'http' in par['out']:
-                                    if con['id'] in par['out']['http']['connections']:
-                                        obj_parser.curl_result(l_par, con)
-                                if 'mail' in par['out']:
-                                    if con['id'] in par['out']['mail']['connections']:
-                                        obj_parser.mail_result(l_par, con)
-                        # check if the output to a file is configured
-                        if 'file' in par['out']:
-                            # write the parser specific result sets to a file
-                            with open(obj_parser.result_file_path, 'w') as fh:
-                                logger.info(lopa.LOG_MAX_TEXT_LEN * '-')
-                                logger.info('{} {}'.format('Write events to parser file', fh.name))
-                                print(json.dumps(l_par, sort_keys=True, indent=4), file=fh)  # file with parser events
-                                logger.info(lopa.LOG_MAX_TEXT_LEN * '-')
-                        # build a total list of all json result records
-                        for res in l_par:
-                            l_all.append(res)
-        # write the total parser result sets to a summary file
-        logger.info('{} {}'.format('Write events to summary file', fha.name))
-        print(json.dumps(l_all, sort_keys=True, indent=4), file=fha)  # file containing all events
+    # checkpoints of the parser runs, used by logs with an active checkpoint
+    checkpoint_path = None
+    checkpoints = None
+    if 'checkpoint' in cfg:
+        checkpoint_path = cfg['checkpoint']['pathName'] + '/' + cfg['checkpoint']['fileName']
+        checkpoints = checkpoint.ClsCheckpointStore(checkpoint_path)
+
+    # environment information of the process, resolved once for all parser runs
+    if 'environment' in cfg:
+        cache_file = None
+        if cfg['environment'].get('fileName'):
+            cache_file = cfg['environment']['pathName'] + '/' + cfg['environment']['fileName']
+        lopa.ENV_TUPLES.configure(cache_file, cfg['environment'].get('lookupTimeout', lopa.ENV_LOOKUP_TIMEOUT))
+
+    # authentication tokens of the http connections, kept across runs if a token file is configured
+    if 'tokens' in cfg and cfg['tokens'].get('fileName'):
+        httpout.TOKENS.configure(cfg['tokens']['pathName'] + '/' + cfg['tokens']['fileName'])
+
+    # concurrent delivery of the results to the http and mail connections
+    cfg_delivery = cfg.get('delivery', {})
+    obj_delivery = delivery.ClsDelivery(logger, cfg_delivery.get('concurrency', delivery.DELIVERY_CONCURRENCY),
+                                        cfg_delivery.get('retries', delivery.DELIVERY_RETRIES),
+                                        cfg_delivery.get('backoff', delivery.DELIVERY_BACKOFF))
+    httpout.POOL.configure(cfg_delivery.get('timeout', delivery.DELIVERY_TIMEOUT))
+    mailout.SENDER.configure(cfg_delivery.get('timeout', delivery.DELIVERY_TIMEOUT))
+    mail_folder = mailout.ClsMailFolder()
+
+    # jobs of parser runs: log, active parsers assigned to the log file and number of the first run
+    jobs = []
+    run = 1
+    for log in cfg['logs']:
+        log_pars = [par for par in cfg['parser'] if par['active'] == 'yes' and log['id'] in par['logId']]
+        if shared_scan or not workers:
+            # run all parsers of the log file in one job
+            jobs.append((log, log_pars, run))
+        else:
+            for par in log_pars:
+                jobs.append((log, [par], run + log_pars.index(par)))
+        run += len(log_pars)
+
+    # summary file containing the events of all runs, written as the runs finish,
+    # with --follow the summary file and the parser files stay open for the events of the appended lines
+    parser_files = jsonout.ClsJsonWriterCache() if follow_mode else None
+    with summary_writer(cfg) as fha, contextlib.ExitStack() as stack:
+        if parser_files is not None:
+            stack.enter_context(parser_files)
+        if workers:
+            # run the jobs in worker processes, the results are provided in the order of the jobs
+            # as soon as a job and all jobs in front of it have finished
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(runner.run_worker, log, log_pars, checkpoint_path,
+                                       logger.getEffectiveLevel(), shared_scan, run, total_runs,
+                                       lopa.ENV_TUPLES.list)
+                           for log, log_pars, run in jobs]
+                for (log, log_pars, run), future in zip(jobs, futures):
+                    runs, records, output = future.result()
+                    for record in records:
+                        logger.handle(record)
+                    print(output, end='')
+                    for par, (run_state, events) in zip(log_pars, runs):
+                        # the parser provides the results of the worker, the log file is not read again
+                        obj_parser = lopa.ClsParser(log, par, logger, checkpoints=checkpoints, run_state=run_state)
+                        output_result(obj_parser, events, par, conns, no_send, obj_delivery, mail_folder, logger, fha,
+                                      parser_files)
+        else:
+            # loop through all specified log files
+            for log, log_pars, run in jobs:
+                for par, obj_parser, events in runner.run_log(log, log_pars, logger, checkpoints, shared_scan, run,
+                                                             total_runs):
+                    output_result(obj_parser, events, par, conns, no_send, obj_delivery, mail_folder, logger, fha,
+                                  parser_files)
+        # send the e-mails folded from several parser runs
+        send_folded_mails(mail_folder, obj_delivery, logger)
+        mailout.SENDER.close()
+        logger.info('{} {} {}'.format('Wrote', fha.count, 'events to summary file ' + fha.name))
+        if follow_mode:
+            fha.flush()
+            parser_files.flush()
+            follow_logs(cfg, conns, checkpoints, no_send, obj_delivery, logger, fha, parser_files)
+    logger.debug('{} {}'.format('Regex registry:', rxregistry.REGISTRY.statistics))
 
 if __name__ == "__main__":
     main()
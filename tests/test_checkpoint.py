@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import checkpoint
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+
+class TestCheckpointStore(unittest.TestCase):
+
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__file_path = os.path.join(self.__dir.name, 'checkpoints.json')
+
+    def tearDown(self):
+        self.__dir.cleanup()
+
+    def test_stores_of_one_file(self):
+        a = checkpoint.ClsCheckpointStore(self.__file_path)
+        b = checkpoint.ClsCheckpointStore(self.__file_path)
+        a.set('L1', 'P1', {'line': 1, 'offset': 10})
+        a.save()
+        b.set('L2', 'P2', {'line': 2, 'offset': 20})
+        b.save()
+        c = checkpoint.ClsCheckpointStore(self.__file_path)
+        self.assertEqual(c.get('L1', 'P1'), {'line': 1, 'offset': 10})
+        self.assertEqual(c.get('L2', 'P2'), {'line': 2, 'offset': 20})
+        # saving again reads the checkpoints of the other store
+        a.save()
+        self.assertEqual(a.get('L2', 'P2'), {'line': 2, 'offset': 20})
+        self.assertFalse([name for name in os.listdir(self.__dir.name) if name.endswith('.tmp')])
+
+    def test_later_checkpoint_wins(self):
+        a = checkpoint.ClsCheckpointStore(self.__file_path)
+        b = checkpoint.ClsCheckpointStore(self.__file_path)
+        a.set('L1', 'P1', {'line': 1, 'offset': 10})
+        a.save()
+        b.set('L1', 'P1', {'line': 3, 'offset': 30})
+        b.save()
+        a.save()  # nothing set since the last save, the checkpoint of the other store is kept
+        self.assertEqual(checkpoint.ClsCheckpointStore(self.__file_path).get('L1', 'P1'), {'line': 3, 'offset': 30})
+
+    def test_missing_directory(self):
+        file_path = os.path.join(self.__dir.name, 'cache', 'checkpoints.json')
+        store = checkpoint.ClsCheckpointStore(file_path)
+        store.set('L1', 'P1', {'line': 1, 'offset': 10})
+        self.assertTrue(store.save())
+        self.assertEqual(checkpoint.ClsCheckpointStore(file_path).get('L1', 'P1'), {'line': 1, 'offset': 10})
+
+    def test_not_writable(self):
+        # the directory of the checkpoint file is a file
+        open(os.path.join(self.__dir.name, 'cache'), 'w').close()
+        store = checkpoint.ClsCheckpointStore(os.path.join(self.__dir.name, 'cache', 'checkpoints.json'))
+        store.set('L1', 'P1', {'line': 1, 'offset': 10})
+        self.assertFalse(store.save())
+        self.assertEqual(store.get('L1', 'P1'), {'line': 1, 'offset': 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import http.server
+import http.client
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import lopa
+import httpout
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+
+class ClsHandler(http.server.BaseHTTPRequestHandler):
+    """ Stand-in for the SSD: token requests and events, kept alive connections (HTTP/1.1).
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        http.server.BaseHTTPRequestHandler.setup(self)
+        self.server.connects += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('content-length', 0)))
+        self.server.requests.append((self.path, self.headers.get('authorization'), body))
+        if self.server.mode == 'drop':
+            self.close_connection = True  # received, but closed without a response
+            return
+        if self.path == '/token':
+            self.server.tokens += 1
+            self.reply(200, json.dumps({'access_token': 't' + str(self.server.tokens), 'expires_in': 3600}))
+        elif self.headers.get('authorization') == 'Bearer t1':
+            self.reply(401, 'expired')
+        else:
+            self.reply(200, 'ok')
+        if self.server.mode == 'idle':
+            self.close_connection = True  # closed after the response, like an idle timeout of the server
+
+    def reply(self, status, text):
+        data = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('content-length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ClsHandler)
+        self.server.daemon_threads = True
+        self.server.connects = 0
+        self.server.tokens = 0
+        self.server.requests = []
+        self.server.mode = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.con = {'id': 'CON_TEST', 'protocol': 'http', 'hostName': '127.0.0.1', 'port': self.server.server_port,
+                    'tokenPath': '/token', 'eventPath': '/events', 'userName': 'user', 'passWord': 'secret'}
+        self.pool = httpout.ClsHttpPool(timeout=5)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        for i in range(5):
+            status, reason, text = self.pool.request(self.con, 'POST', '/events', '{"i": ' + str(i) + '}')
+            self.assertEqual((status, text), (200, 'ok'))
+        self.assertEqual(self.server.connects, 1)
+        self.assertEqual(self.pool.statistics, {'idle': 1, 'requests': 5, 'connects': 1})
+
+    def test_reconnect_after_idle_close(self):
+        self.server.mode = 'idle'
+        for i in range(3):
+            status, reason, text = self.pool.request(self.con, 'POST', '/events', '{}')
+            self.assertEqual(status, 200)
+            time.sleep(0.1)  # the server closes the idle connection
+        self.assertEqual(self.server.connects, 3)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_no_resend_after_sending(self):
+        self.pool.request(self.con, 'POST', '/events', '{}')
+        self.server.mode = 'drop'
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.pool.request(self.con, 'POST', '/events', '{"sent": "once"}')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_token_refresh(self):
+        httpout.POOL.close()
+        httpout.TOKENS.configure()
+        parser = type('ClsStub', (), {'_ClsParser__logger': logging.getLogger('test'),
+                                      'http_token': lopa.ClsParser.http_token})()
+        try:
+            con = dict(self.con)
+            # the first token is rejected, the event is sent again with a new token
+            self.assertEqual(lopa.ClsParser.http_send(parser, con, '/events', '{}'), (True, '200 OK'))
+            self.assertEqual(lopa.ClsParser.http_send(parser, con, '/events', '{}'), (True, '200 OK'))
+        finally:
+            httpout.POOL.close()
+            httpout.TOKENS.configure()
+        self.assertEqual(self.server.tokens, 2)
+        self.assertEqual([(path, auth) for path, auth, body in self.server.requests],
+                         [('/token', None), ('/events', 'Bearer t1'), ('/token', None), ('/events', 'Bearer t2'),
+                          ('/events', 'Bearer t2')])
+
+
+if __name__ == '__main__':
+    unittest.main()
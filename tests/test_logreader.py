@@ -0,0 +1,69 @@
+import os
+import bz2
+import sys
+import gzip
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import logreader
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+
+class TestMemberIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__block_size = logreader.MEMBER_INDEX_BLOCK_SIZE
+
+    def tearDown(self):
+        logreader.MEMBER_INDEX_BLOCK_SIZE = self.__block_size
+        self.__dir.cleanup()
+
+    def test_member_at_block_edge(self):
+        members = [gzip.compress(''.join('member {} line {}\n'.format(m, n) for n in range(10)).encode())
+                   for m in range(3)]
+        file_path = os.path.join(self.__dir.name, 'test.log.gz')
+        with open(file_path, 'wb') as fh:
+            fh.write(b''.join(members))
+        # the first block ends one byte behind the first member, inside the magic of the second one
+        logreader.MEMBER_INDEX_BLOCK_SIZE = len(members[0]) + 1
+        obj_index = logreader.ClsMemberIndex(file_path, file_path + logreader.MEMBER_INDEX_EXT,
+                                             logreader.COMPRESSION_GZIP, step=10)
+        obj_index.update()
+        self.assertEqual(obj_index.lines_number, 30)
+        self.assertEqual(obj_index.points, 3)
+        self.assertEqual(obj_index.seek(25), (21, len(members[0]) + len(members[1])))
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.__dir.cleanup()
+
+    def compression(self, data):
+        file_path = os.path.join(self.__dir.name, 'test.log')
+        with open(file_path, 'wb') as fh:
+            fh.write(data)
+        return logreader.compression(file_path)
+
+    def test_formats(self):
+        self.assertEqual(self.compression(gzip.compress(b'line\n')), logreader.COMPRESSION_GZIP)
+        self.assertEqual(self.compression(bz2.compress(b'line\n')), logreader.COMPRESSION_BZIP2)
+        self.assertIsNone(self.compression(b'line\n'))
+
+    def test_text_with_bzip2_magic(self):
+        self.assertIsNone(self.compression(b'BZh: log line\n'))
+        self.assertIsNone(self.compression(b'BZh'))
+        self.assertIsNone(self.compression(b'BZh0\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import lopa
+import logreader
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+
+class TestReadOffset(unittest.TestCase):
+
+    def setUp(self):
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__file_path = os.path.join(self.__dir.name, 'test.log')
+        with open(self.__file_path, 'wb') as fh:
+            fh.write(b'line1\nab\xe2\x82')  # the last character is cut
+
+    def tearDown(self):
+        self.__dir.cleanup()
+
+    def read_offset(self, fh, line_break):
+        incomplete = line_break[:0]
+        for line in iter(fh.readline, line_break[:0]):
+            if not line.endswith(line_break):
+                incomplete = line
+                break
+        return lopa.ClsParser.read_offset(fh, incomplete)
+
+    def test_incomplete_character_text(self):
+        for errors in ('replace', 'ignore'):
+            with logreader.open_text(self.__file_path, 0, None, 'utf-8', errors) as fh:
+                self.assertEqual(self.read_offset(fh, '\n'), 6, errors)
+
+    def test_incomplete_character_mapped(self):
+        mm = logreader.open_mapped(self.__file_path)
+        try:
+            self.assertEqual(self.read_offset(mm, b'\n'), 6)
+        finally:
+            mm.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import threading
+import socketserver
+import unittest
+from email.mime.text import MIMEText
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import delivery
+import mailout
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+
+class ClsSmtpHandler(socketserver.StreamRequestHandler):
+    """ Stand-in for a mail server, accepting every message.
+    """
+
+    def reply(self, text):
+        self.wfile.write(text.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.connects += 1
+        self.reply('220 stub')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                self.reply('250 stub')
+            elif command == b'DATA':
+                self.reply('354 end with .')
+                data = []
+                for line in iter(self.rfile.readline, b''):
+                    if line == b'.\r\n':
+                        break
+                    data.append(line)
+                self.server.messages.append(b''.join(data))
+                self.reply('250 queued')
+                if self.server.mode == 'idle':
+                    return  # closed after the message, like an idle timeout of the server
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class TestMailSender(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), ClsSmtpHandler)
+        self.server.daemon_threads = True
+        self.server.connects = 0
+        self.server.messages = []
+        self.server.mode = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = '127.0.0.1:' + str(self.server.server_address[1])
+        self.sender = mailout.ClsMailSender(timeout=5)
+
+    def tearDown(self):
+        self.sender.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def message(i):
+        msg = MIMEText('[{"i": ' + str(i) + '}]')
+        msg['Subject'] = 'events ' + str(i)
+        msg['From'] = 'parser@localhost'
+        msg['To'] = 'ssd@localhost'
+        return msg
+
+    def test_one_session(self):
+        for i in range(5):
+            self.sender.send(self.host, self.message(i))
+        self.assertEqual(self.server.connects, 1)
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.sender.statistics, {'sessions': 1, 'messages': 5, 'connects': 1})
+
+    def test_reconnect(self):
+        self.server.mode = 'idle'
+        for i in range(3):
+            self.sender.send(self.host, self.message(i))
+            time.sleep(0.1)  # the server closes the idle session
+        self.assertEqual(self.server.connects, 3)
+        self.assertEqual(len(self.server.messages), 3)
+
+    def test_no_server(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertRaises(delivery.ClsConnectError):
+            self.sender.send(self.host, self.message(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import re
+import sys
+import itertools
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+import prefilter
+
+__author__ = 'Ralf'
+
+# !/usr/bin/env python3
+
+# constants
+KEYS = [['ERROR', 'WARN', 'a'], ['DB', 'NET', 'b']]
+REGEXES = [r'(%k1%): (%k2%)',
+           r'(?!.*%k1%)ERROR (%k2%)',
+           r'(?<!%k1%) (%k2%)',
+           r'x[%k1%]+ (%k2%)',
+           r'[^]%k1%]+ %k2%',
+           r'(%k1%)|(%k2%)',
+           r'(%k1%)? (%k2%)',
+           r'(?=.*%k1%)(%k2%)',
+           r'(?i)%k1% %k2%']
+LINES = ['ERROR: DB down', 'WARN: NET slow', 'ERROR DB', 'ERROR NET', 'WARN DB', 'INFO DB', 'x NET',
+         'xa b', 'xaaa NET', 'xERROR DB', 'error: db', 'b', ' DB', 'ERROR: ', 'DB ERROR', 'nothing at all']
+
+
+class TestKeyPrefilter(unittest.TestCase):
+
+    @staticmethod
+    def search_col(regex):
+        items = []
+        for in_lst in itertools.product(*KEYS):
+            rx = regex
+            for i, text in enumerate(in_lst):
+                rx = rx.replace(prefilter.KEY_PLACEHOLDER.format(i + 1), text)
+            items.append({'in': list(in_lst), 'rx': re.compile(rx)})
+        return items
+
+    def check(self, regex, encoding=None):
+        search_col = self.search_col(regex)
+        obj_prefilter = prefilter.ClsKeyPrefilter(search_col, regex, encoding)
+        for line in LINES:
+            expected = [i for i, item in enumerate(search_col) if item['rx'].search(line)]
+            checked = line.encode(encoding) if encoding else line
+            indexes = obj_prefilter.candidate_indexes(checked)
+            self.assertEqual([i for i in indexes if search_col[i]['rx'].search(line)], expected, (regex, line))
+            if expected:
+                self.assertTrue(obj_prefilter.may_match(checked), (regex, line))
+
+    def test_search_list(self):
+        for regex in REGEXES:
+            self.check(regex)
+
+    def test_search_list_bytes(self):
+        for regex in REGEXES:
+            self.check(regex, 'utf-8')
+
+    def test_negative_lookaround(self):
+        for regex in (r'(?!.*%k1%)ERROR (%k2%)', r'(?<!%k1%) (%k2%)'):
+            self.assertFalse(prefilter.ClsKeyPrefilter(self.search_col(regex), regex).active, regex)
+
+
+if __name__ == '__main__':
+    unittest.main()